@@ -3,7 +3,8 @@ from src import (
     QApplication,
     MainWindowView,
     ApplicationAttributes,
-    SettingsView
+    SettingsView,
+    PlaybackWorker,
 )
 
 
@@ -17,9 +18,18 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
 
-    window = MainWindowView(None)
+    playbackWorker = PlaybackWorker()
+    window = MainWindowView(None, playbackWorker)
+
+    # Let commands in flight return before the session goes away
+    app.aboutToQuit.connect(window.playbackController().waitForDone)
+    app.aboutToQuit.connect(playbackWorker.stop)
+
+    settings = SettingsView(None)
+    settings.autoThemeToggled.connect(window.setAutoTheme)
+    window.settingsRequested.connect(settings.show)
+
     window.show()
+    playbackWorker.start()
 
-    # settings = SettingsView(None)
-    # settings.show()
     sys.exit(app.exec())
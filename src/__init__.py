@@ -1 +1,8 @@
-from .ui import QApplication, MainWindowView, SettingsView, ApplicationAttributes
\ No newline at end of file
+from .ui import (
+    QApplication,
+    MainWindowView,
+    SettingsView,
+    ApplicationAttributes,
+    PlaybackWorker,
+    PlaybackController,
+)
\ No newline at end of file
@@ -1 +1 @@
-from .lyrics_view_model import LyricsViewModel
\ No newline at end of file
+from .lyrics import *
\ No newline at end of file
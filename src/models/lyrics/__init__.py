@@ -0,0 +1,33 @@
+from .data_types import TrackDetails, LRCEntry, LyricTime, LyricSource
+from .lyrics_view_model import LyricsViewModel, LRCLyrics
+from .spotify_session import PlaybackSession, PlaybackStatus, PollResult
+from .poll_scheduler import PollScheduler
+from .playback_clock import PlaybackClock
+from .playback_commands import PendingCommands
+from .album_art import AlbumArtCache, AlbumArtService, select_image
+from .art_palette import ArtPalette, PaletteCache, extract_palette
+from .track_events import TrackEventStream, PlaybackEvent, PlaybackEventType
+
+__all__ = [
+    "TrackDetails",
+    "LRCEntry",
+    "LyricTime",
+    "LyricSource",
+    "LyricsViewModel",
+    "LRCLyrics",
+    "PlaybackSession",
+    "PlaybackStatus",
+    "PollResult",
+    "PollScheduler",
+    "PlaybackClock",
+    "PendingCommands",
+    "TrackEventStream",
+    "PlaybackEvent",
+    "PlaybackEventType",
+    "AlbumArtCache",
+    "AlbumArtService",
+    "select_image",
+    "ArtPalette",
+    "PaletteCache",
+    "extract_palette",
+]
@@ -0,0 +1,265 @@
+import os, hashlib, logging, threading
+import requests
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Sequence
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+from requests.adapters import HTTPAdapter
+from .utils import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".showlyrics", "album_art")
+    MAX_CACHE_BYTES = 32 * 1024 * 1024
+    FILE_SUFFIX = ".img"
+    REQUESTS_TIMEOUT_S = 10
+    POOL_SIZE = 2
+
+
+def select_image(images, target_px):
+    # type: (Sequence[tuple[int, str]], float) -> str
+    """
+    Pick the smallest image at least `target_px` wide from (width, url) pairs, e.g. `TrackDetails.album_images`.
+
+    Falls back to the largest image when none is big enough. Images of unknown width (0) are only used
+    when no size is known at all. Returns "" if there are no images.
+    """
+    sized = [(width, url) for width, url in images if width > 0 and url]
+    if not sized:
+        return next((url for _, url in images if url), "")
+
+    large_enough = [image for image in sized if image[0] >= target_px]
+    if large_enough:
+        return min(large_enough)[1]
+    return max(sized)[1]
+
+
+class AlbumArtCache:
+    """
+    Size-limited on-disk cache of encoded images, keyed by image URL.
+
+    Spotify image URLs are immutable, so entries never go stale; the least recently used ones are
+    removed once the cache grows beyond `max_bytes`. Recency survives restarts through file mtimes.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=CONSTANTS.MAX_CACHE_BYTES):
+        # type: (str | None, int) -> None
+        self.cache_dir = cache_dir or CONSTANTS.DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+
+        self.__lock = threading.Lock()
+        self.__sizes = OrderedDict()  # type: OrderedDict[str, int]  # file name -> size, least recently used first
+        self.__total_bytes = 0
+        self.__scan()
+
+    def __len__(self):
+        return len(self.__sizes)
+
+    @property
+    def total_bytes(self):
+        # type: () -> int
+        return self.__total_bytes
+
+    @staticmethod
+    def file_name(url):
+        # type: (str) -> str
+        return hashlib.sha1(url.encode("utf-8")).hexdigest() + CONSTANTS.FILE_SUFFIX
+
+    def __scan(self):
+        try:
+            entries = [
+                entry
+                for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.endswith(CONSTANTS.FILE_SUFFIX)
+            ]
+        except OSError:
+            return
+
+        stats = sorted(((entry.stat(), entry.name) for entry in entries), key=lambda s: s[0].st_mtime)
+        with self.__lock:
+            for stat, name in stats:
+                self.__sizes[name] = stat.st_size
+                self.__total_bytes += stat.st_size
+
+    def get(self, url):
+        # type: (str) -> bytes | None
+        name = self.file_name(url)
+        with self.__lock:
+            if name not in self.__sizes:
+                return None
+            self.__sizes.move_to_end(name)
+
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+            os.utime(path)
+        except OSError:
+            self.__forget(name)
+            return None
+        return data
+
+    def put(self, url, data):
+        # type: (str, bytes) -> None
+        if len(data) > self.max_bytes:
+            return
+
+        name = self.file_name(url)
+        try:
+            atomic_write_bytes(os.path.join(self.cache_dir, name), data)
+        except OSError:
+            logger.warning("Caching album art from %s failed", url, exc_info=True)
+            return
+
+        with self.__lock:
+            self.__total_bytes += len(data) - self.__sizes.pop(name, 0)
+            self.__sizes[name] = len(data)
+            evicted = []
+            while self.__total_bytes > self.max_bytes and self.__sizes:
+                old_name, size = self.__sizes.popitem(last=False)
+                self.__total_bytes -= size
+                evicted.append(old_name)
+
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, old_name))
+            except OSError:
+                pass
+
+    def __forget(self, name):
+        # type: (str) -> None
+        with self.__lock:
+            self.__total_bytes -= self.__sizes.pop(name, 0)
+
+    def clear(self):
+        # type: () -> None
+        with self.__lock:
+            names = list(self.__sizes)
+            self.__sizes.clear()
+            self.__total_bytes = 0
+
+        for name in names:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+
+class AlbumArtService:
+    """
+    Fetch album art at the size it will be shown, from the cache when possible.
+
+    Downloads share one pooled keep-alive HTTP session and run on a small thread pool. Concurrent
+    requests for the same URL are merged, so a track change costs at most one download of one small image,
+    and a track that was shown before costs none.
+    """
+
+    def __init__(self, cache=None, http=None, requests_timeout=CONSTANTS.REQUESTS_TIMEOUT_S):
+        # type: (AlbumArtCache | None, requests.Session | None, float) -> None
+        self.cache = cache if cache is not None else AlbumArtCache()
+        self.requests_timeout = requests_timeout
+
+        if http is None:
+            http = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=CONSTANTS.POOL_SIZE, pool_maxsize=CONSTANTS.POOL_SIZE
+            )
+            http.mount("https://", adapter)
+            http.mount("http://", adapter)
+        self.__http = http
+
+        self.__lock = threading.Lock()
+        self.__in_flight = {}  # type: dict[str, Future]
+        self.__executor = ThreadPoolExecutor(
+            max_workers=CONSTANTS.POOL_SIZE, thread_name_prefix="AlbumArt"
+        )
+
+    def fetch_url(self, url):
+        # type: (str) -> bytes | None
+        """Encoded image at `url`, or None if it can't be downloaded. Blocks on a cache miss"""
+        if not url:
+            return None
+
+        if url.startswith("file://"):
+            # Local players (MPRIS) point at files they already keep on disk
+            try:
+                with open(url2pathname(urlsplit(url).path), "rb") as fp:
+                    return fp.read()
+            except OSError:
+                return None
+
+        data = self.cache.get(url)
+        if data is not None:
+            return data
+
+        try:
+            response = self.__http.get(url, timeout=self.requests_timeout)
+            response.raise_for_status()
+        except requests.RequestException:
+            logger.warning("Downloading album art from %s failed", url, exc_info=True)
+            return None
+
+        data = response.content
+        self.cache.put(url, data)
+        return data
+
+    def fetch(self, images, target_px):
+        # type: (Sequence[tuple[int, str]], float) -> bytes | None
+        return self.fetch_url(select_image(images, target_px))
+
+    def fetch_async(self, images, target_px, callback):
+        # type: (Sequence[tuple[int, str]], float, Callable[[str, bytes | None], None]) -> Future
+        """
+        Fetch the best image for `target_px` on the pool and call `callback(url, data)` from a pool thread.
+
+        The returned future resolves to the encoded image, or None.
+        """
+        url = select_image(images, target_px)
+
+        with self.__lock:
+            future = self.__in_flight.get(url, None)
+            is_new = future is None
+            if is_new:
+                future = self.__executor.submit(self.fetch_url, url)
+                self.__in_flight[url] = future
+
+        if is_new:
+            # Outside the lock: the callback runs right here if the download already finished
+            future.add_done_callback(lambda _: self.__done(url))
+
+        def notify(done):
+            # type: (Future) -> None
+            if callable(callback):
+                callback(url, done.result() if not done.cancelled() else None)
+
+        future.add_done_callback(notify)
+        return future
+
+    def __done(self, url):
+        # type: (str) -> None
+        with self.__lock:
+            self.__in_flight.pop(url, None)
+
+    def close(self):
+        # type: () -> None
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+        self.__http.close()
+
+
+_DEFAULT_SERVICE = None  # type: AlbumArtService | None
+_DEFAULT_SERVICE_LOCK = threading.Lock()
+
+
+def get_album_art_service():
+    # type: () -> AlbumArtService
+    """Return the service shared by this process, creating it on first use"""
+    global _DEFAULT_SERVICE
+
+    with _DEFAULT_SERVICE_LOCK:
+        if _DEFAULT_SERVICE is None:
+            _DEFAULT_SERVICE = AlbumArtService()
+        return _DEFAULT_SERVICE
@@ -1,10 +1,22 @@
 import syncedlyrics
 import spotipy
-from data_types import TrackDetails
+from .data_types import TrackDetails
+from .circuit_breaker import CircuitBreaker
+from .local_library import LocalLRCLibrary
+from .lrc_parser import parse_lrc, LRCParseResult
+from .spotify_session import (
+    PlaybackSession,
+    PlaybackStatus,
+    PollResult,
+    decode_currently_playing,
+)
+from .token_cache import SpotifyFileCacheHandler
 from dotenv import load_dotenv
-import os
+import os, logging, time, threading
 
 
+logger = logging.getLogger(__name__)
+
 # TODO: Allow caller to specify these values; Remove load_dotenv from this module
 SCRIPT_PATH = os.path.abspath(os.path.realpath(__file__))
 dotenv_path = os.path.abspath(os.path.join(SCRIPT_PATH, "..", "..", "..", "..", ".env"))
@@ -13,6 +25,16 @@ load_dotenv(dotenv_path)
 CLIENT_ID = os.getenv("CLIENT_ID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 REDIRECT_URI = os.getenv("REDIRECT_URI")
+TOKEN_CACHE_PATH = os.getenv("TOKEN_CACHE_PATH") or None  # Uses the default location if not set
+SPOTIFY_API_PREFIX = os.getenv("SPOTIFY_API_PREFIX") or None  # e.g. `tools/mock_spotify_server.py` for load testing
+SPOTIFY_TOKEN_URL = os.getenv("SPOTIFY_TOKEN_URL") or None
+PLAYBACK_SOURCE = (os.getenv("PLAYBACK_SOURCE") or "spotify").lower()  # `spotify` or `mpris`
+MPRIS_PLAYER = os.getenv("MPRIS_PLAYER") or "spotify"
+LRC_LIBRARY_DIR = os.getenv("LRC_LIBRARY_DIR") or None  # Directory of `.lrc` files searched before any provider
+LYRICS_CACHE_PATH = os.getenv("LYRICS_CACHE_PATH") or os.path.join(
+    os.path.expanduser("~"), ".showlyrics", "lyrics_cache.json"
+)
+LYRICS_OFFLINE = (os.getenv("LYRICS_OFFLINE") or "").lower() in ("1", "true", "yes")
 
 SPOTIFY_SCOPE_READ_PLAYBACK_STATE = "user-read-playback-state"
 SPOTIFY_SCOPE_MODIFY_PLAYBACK_STATE = "user-modify-playback-state"
@@ -23,15 +45,75 @@ SCOPES = [
     SPOTIFY_SCOPE_READ_CURRENTLY_PLAYING,
 ]
 
+# Shared by callers of `get_currently_playing_song` that don't pass their own session
+_DEFAULT_PLAYBACK_SESSION = None  # type: PlaybackSession | None
+_DEFAULT_PLAYBACK_SESSION_LOCK = threading.Lock()
+
+_LOCAL_LIBRARY = None  # type: LocalLRCLibrary | None
+_LOCAL_LIBRARY_LOCK = threading.Lock()
+
+# One breaker per provider, shared by every lookup, so an unavailable provider is skipped instantly
+_PROVIDER_BREAKERS = {}  # type: dict[str, CircuitBreaker]
+
+
+def get_provider_breaker(provider_name):
+    # type: (str) -> CircuitBreaker
+    breaker = _PROVIDER_BREAKERS.get(provider_name, None)
+    if breaker is None:
+        breaker = _PROVIDER_BREAKERS.setdefault(
+            provider_name, CircuitBreaker(provider_name)
+        )
+    return breaker
+
+
+def get_local_library():
+    # type: () -> LocalLRCLibrary | None
+    """Return the library of `.lrc` files in `LRC_LIBRARY_DIR`, or None if no directory is configured"""
+    global _LOCAL_LIBRARY
+
+    if not LRC_LIBRARY_DIR:
+        return None
+
+    with _LOCAL_LIBRARY_LOCK:
+        if _LOCAL_LIBRARY is None:
+            _LOCAL_LIBRARY = LocalLRCLibrary(LRC_LIBRARY_DIR)
+        return _LOCAL_LIBRARY
+
 
-def get_lrc_lyrics(track_name, artist_name):
-    # type: (str, str) -> dict[str, str | None]
+def get_lrc_lyrics(track_name, artist_name, local_library=None, use_network=True):
+    # type: (str, str, LocalLRCLibrary | None, bool) -> dict[str, str | LRCParseResult | None]
     """
     Retrieves the lyric for the track specified in the search term in LRC format.
 
+    The result holds the raw `lrc` text, its `source` and the `parsed` timeline (`LRCParseResult`),
+    so the lyrics are validated and parsed once.
+
     search_term: `[TRACK_NAME] [ARTIST_NAME]`
+
+    If `local_library` is given, it is searched first and a valid local match never touches the network.
+    With `use_network` set to False, only the local library is searched.
+
+    Providers whose circuit breaker is open (recent errors or timeouts) are skipped without being queried.
     """
 
+    result = {
+        "lrc": None,
+        "source": None,
+        "parsed": None,
+    }
+
+    if local_library is not None:
+        lrc_lyrics = local_library.get_lrc(track_name, artist_name)
+        parsed = parse_lrc(lrc_lyrics)
+        if parsed:
+            result["lrc"] = lrc_lyrics
+            result["source"] = LocalLRCLibrary.__name__
+            result["parsed"] = parsed
+            return result
+
+    if not use_network:
+        return result
+
     transform_str = lambda s: s.strip().replace(" ", "_")
     search_term = transform_str(track_name) + " " + transform_str(artist_name)
 
@@ -42,34 +124,52 @@ def get_lrc_lyrics(track_name, artist_name):
         syncedlyrics.Megalobiz(),
     ]
 
-    result = {
-        "lrc": None,
-        "source": None,
-    }
-
     for provider in _providers:
-
-        lrc_lyrics = provider.get_lrc(search_term)
-
-        if syncedlyrics.is_lrc_valid(lrc_lyrics):
+        provider_name = provider.__class__.__name__
+        breaker = get_provider_breaker(provider_name)
+
+        if not breaker.allow_request():
+            continue
+
+        start = time.monotonic()
+        try:
+            lrc_lyrics = provider.get_lrc(search_term)
+        except Exception:
+            logger.warning("Lyrics provider %s failed", provider_name, exc_info=True)
+            breaker.record_failure()
+            continue
+        breaker.record_success((time.monotonic() - start) * 1000)
+
+        parsed = parse_lrc(lrc_lyrics)
+        if parsed:
             result["lrc"] = lrc_lyrics
-            result["source"] = provider.__class__.__name__
+            result["source"] = provider_name
+            result["parsed"] = parsed
             break
 
     return result
 
 
+def spotify_token_cache_handler(cached_token_info=None):
+    # type: (dict | None) -> SpotifyFileCacheHandler
+    """Return the on-disk token cache, seeded with `cached_token_info` if given"""
+    cache_handler = SpotifyFileCacheHandler(TOKEN_CACHE_PATH)
+    if cached_token_info:
+        cache_handler.save_token_to_cache(cached_token_info)
+    return cache_handler
+
+
 def spotify_acquire_token_info(cached_token_info=None):
     # type: (dict | None) -> dict
     """
     Retrieve token info for authenticated user
 
-    This function will take the user to the Spotify authentication page on their web browser.
-    The token info is not stored locally, within this function
+    The token info is read from and saved to the on-disk token cache. Only if no token is cached
+    will this function take the user to the Spotify authentication page on their web browser.
 
     """
 
-    cache_handler = spotipy.cache_handler.MemoryCacheHandler(cached_token_info)
+    cache_handler = spotify_token_cache_handler(cached_token_info)
     oauth = spotipy.oauth2.SpotifyOAuth(
         client_id=CLIENT_ID,
         client_secret=CLIENT_SECRET,
@@ -95,55 +195,70 @@ def spotify_acquire_token_info(cached_token_info=None):
         return token_info
 
 
-def get_currently_playing_song(cached_token_info=None):
+def get_playback_session(cached_token_info=None):
+    # type: (dict | None) -> PlaybackSession
+    """Return the long-lived session shared by this process, creating it on first use"""
+    global _DEFAULT_PLAYBACK_SESSION
+
+    with _DEFAULT_PLAYBACK_SESSION_LOCK:
+        # A closed session (e.g. after `PlaybackWorker.stop`) is replaced rather than reused
+        if _DEFAULT_PLAYBACK_SESSION is None or _DEFAULT_PLAYBACK_SESSION.closed:
+            _DEFAULT_PLAYBACK_SESSION = PlaybackSession(
+                CLIENT_ID,
+                CLIENT_SECRET,
+                REDIRECT_URI,
+                SCOPES,
+                cache_handler=spotify_token_cache_handler(cached_token_info),
+                api_prefix=SPOTIFY_API_PREFIX,
+                token_url=SPOTIFY_TOKEN_URL,
+            ).start()
+        return _DEFAULT_PLAYBACK_SESSION
+
+
+def get_playback_source(cached_token_info=None):
+    # type: (dict | None) -> PlaybackSession | MprisPlaybackSource
+    """
+    Return the playback source selected by `PLAYBACK_SOURCE`.
+
+    `mpris` reads a local player over D-Bus instead of polling the Web API. Both sources provide `poll`.
+    """
+    if PLAYBACK_SOURCE == "mpris":
+        # PyGObject is only needed, and only available, on Linux
+        from .mpris_source import MprisPlaybackSource
+
+        return MprisPlaybackSource(MPRIS_PLAYER).start()
 
-    token_info = spotify_acquire_token_info(cached_token_info)
+    return get_playback_session(cached_token_info)
 
-    token = token_info["access_token"]
 
-    try:
-        spotify_obj = spotipy.Spotify(auth=token)
+def poll_currently_playing(cached_token_info=None, session=None):
+    # type: (dict | None, PlaybackSession | None) -> PollResult
+    """
+    Retrieve the user's currently playing track along with a `PlaybackStatus`.
 
-        track = spotify_obj.currently_playing()
-    except:
-        # TODO: Log error
-        return None
+    Polls reuse `session` (or the process-wide session) so each call is a single request on a warm connection.
+    While rate limited, no request is made and the status is `PlaybackStatus.THROTTLED`.
+    """
 
-    if track is not None:
-        track_type = track["currently_playing_type"]
-        meta = {
-            "actions": track["actions"],
-        }
-
-        item = track["item"]
-        name = ""
-        artists = []
-        is_playing = track["is_playing"]
-        progress_ms = track["progress_ms"] if track["progress_ms"] else -1
-        duration_ms = -1
-        popularity = -1
-
-        if item:
-            name = item["name"]
-            popularity = item["popularity"] / 100
-            duration_ms = item["duration_ms"]
-            artists = list(map(lambda x: x["name"], item["artists"]))
-
-        return TrackDetails(
-            name=name,
-            artists=artists,
-            is_playing=is_playing,
-            ms_remote=progress_ms,
-            duration_ms=duration_ms,
-            popularity=popularity,
-            meta=meta,
-            track_type=track_type,
-        )
+    if session is None:
+        session = get_playback_session(cached_token_info)
 
-    return track
+    return session.poll()
+
+
+def get_currently_playing_song(cached_token_info=None, session=None):
+    # type: (dict | None, PlaybackSession | None) -> TrackDetails | None
+    """
+    Retrieve the user's currently playing track, or None if nothing is playing or the request failed.
+
+    Use `poll_currently_playing` to tell rate limiting and errors apart from silence.
+    """
+    return poll_currently_playing(cached_token_info, session).track
 
 
 if __name__ == "__main__":
+    # The module uses package-relative imports, so run it from the repository root:
+    # python -m src.models.lyrics.api
     from pprint import pprint
 
     pprint(get_currently_playing_song())
@@ -0,0 +1,143 @@
+import math, threading
+import numpy as np
+from collections import OrderedDict
+from typing import Hashable
+
+
+class CONSTANTS:
+    __slots__ = ()
+    SAMPLE_SIZE = 48  # Images are reduced to at most this many pixels per side before analysis
+    QUANT_BITS = 4  # Histogram resolution per channel
+    CANDIDATES = 8  # Most common colours considered for the palette
+    MIN_TEXT_CONTRAST = 4.5  # WCAG AA contrast for normal text
+    MIN_ACCENT_CONTRAST = 3.0  # WCAG AA contrast for large text
+    CACHE_ENTRIES = 128
+    DEFAULT_BACKGROUND = (24, 24, 24)
+    WHITE = (255, 255, 255)
+    BLACK = (0, 0, 0)
+
+
+class ArtPalette:
+    """Window colours derived from a piece of artwork, as (r, g, b) tuples"""
+
+    __slots__ = ("background", "foreground", "accent")
+
+    def __init__(self, background, foreground, accent):
+        # type: (tuple[int, int, int], tuple[int, int, int], tuple[int, int, int]) -> None
+        self.background = background  # The artwork's dominant colour
+        self.foreground = foreground  # Readable on `background`
+        self.accent = accent  # A second colour from the artwork that stands out on `background`
+
+    def __repr__(self):
+        return f"ArtPalette(background={self.background}, foreground={self.foreground}, accent={self.accent})"
+
+
+def relative_luminance(rgb):
+    # type: (tuple[int, int, int]) -> float
+    """WCAG 2 relative luminance of an sRGB colour"""
+    channels = []
+    for value in rgb:
+        c = value / 255
+        channels.append(c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4)
+    return 0.2126 * channels[0] + 0.7152 * channels[1] + 0.0722 * channels[2]
+
+
+def contrast_ratio(a, b):
+    # type: (tuple[int, int, int], tuple[int, int, int]) -> float
+    la, lb = relative_luminance(a), relative_luminance(b)
+    return (max(la, lb) + 0.05) / (min(la, lb) + 0.05)
+
+
+def dominant_colors(pixels, count=CONSTANTS.CANDIDATES):
+    # type: (np.ndarray, int) -> list[tuple[tuple[int, int, int], int]]
+    """
+    Most common colours of an (height, width, 3 or 4) uint8 RGB(A) array, as ((r, g, b), pixel count) pairs.
+
+    Pixels are bucketed in a coarse RGB histogram, and each bucket reports the mean of its pixels,
+    so the result is both fast and faithful to the artwork's actual colours. Transparent pixels are ignored.
+    """
+    height, width = pixels.shape[:2]
+    step = max(1, math.ceil(max(height, width) / CONSTANTS.SAMPLE_SIZE))
+    sample = pixels[::step, ::step]
+
+    if sample.shape[2] == 4:
+        sample = sample[sample[..., 3] >= 128][:, :3]
+    sample = sample.reshape(-1, 3).astype(np.int64)
+    if sample.size == 0:
+        return []
+
+    bits = CONSTANTS.QUANT_BITS
+    quantised = sample >> (8 - bits)
+    bins = (quantised[:, 0] << (2 * bits)) | (quantised[:, 1] << bits) | quantised[:, 2]
+
+    bin_count = 1 << (3 * bits)
+    counts = np.bincount(bins, minlength=bin_count)
+    sums = np.stack(
+        [np.bincount(bins, weights=sample[:, c], minlength=bin_count) for c in range(3)],
+        axis=1,
+    )
+
+    top = np.argsort(counts)[::-1][:count]
+    top = top[counts[top] > 0]
+    means = np.rint(sums[top] / counts[top, None]).astype(np.int64)
+
+    return [
+        ((int(r), int(g), int(b)), int(n)) for (r, g, b), n in zip(means, counts[top])
+    ]
+
+
+def extract_palette(pixels):
+    # type: (np.ndarray) -> ArtPalette
+    """Pick background, text and accent colours from an (height, width, 3 or 4) uint8 RGB(A) array"""
+    colors = [color for color, _ in dominant_colors(pixels)]
+    if not colors:
+        background = CONSTANTS.DEFAULT_BACKGROUND
+        return ArtPalette(background, CONSTANTS.WHITE, CONSTANTS.WHITE)
+
+    background = colors[0]
+
+    # Prefer a colour from the artwork itself, falling back to white or black
+    plain = max((CONSTANTS.WHITE, CONSTANTS.BLACK), key=lambda c: contrast_ratio(c, background))
+    foreground = next(
+        (c for c in colors[1:] if contrast_ratio(c, background) >= CONSTANTS.MIN_TEXT_CONTRAST),
+        plain,
+    )
+    accent = next(
+        (
+            c
+            for c in colors[1:]
+            if c != foreground
+            and contrast_ratio(c, background) >= CONSTANTS.MIN_ACCENT_CONTRAST
+        ),
+        foreground,
+    )
+    return ArtPalette(background, foreground, accent)
+
+
+class PaletteCache:
+    """Palettes by image key (e.g. the artwork url), least recently used first out"""
+
+    def __init__(self, max_entries=CONSTANTS.CACHE_ENTRIES):
+        # type: (int) -> None
+        self.max_entries = max_entries
+        self.__lock = threading.Lock()
+        self.__palettes = OrderedDict()  # type: OrderedDict[Hashable, ArtPalette]
+
+    def __len__(self):
+        return len(self.__palettes)
+
+    def get(self, key):
+        # type: (Hashable) -> ArtPalette | None
+        with self.__lock:
+            palette = self.__palettes.get(key, None)
+            if palette is not None:
+                self.__palettes.move_to_end(key)
+            return palette
+
+    def put(self, key, palette):
+        # type: (Hashable, ArtPalette) -> None
+        with self.__lock:
+            self.__palettes[key] = palette
+            self.__palettes.move_to_end(key)
+            while len(self.__palettes) > self.max_entries:
+                self.__palettes.popitem(last=False)
@@ -0,0 +1,119 @@
+import enum
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+
+class BreakerState(enum.Enum):
+    CLOSED = enum.auto()  # Requests flow normally
+    OPEN = enum.auto()  # Requests are rejected until the cool down period elapses
+    HALF_OPEN = enum.auto()  # A single trial request is allowed through
+
+
+class CircuitBreaker:
+    """
+    Track the health of a single lyrics provider and decide whether it should be queried.
+
+    The breaker opens when the failure rate over the most recent calls exceeds `failure_rate_threshold`,
+    where calls slower than `slow_call_ms` count as failures. Once open, every request is rejected
+    until `cool_down_s` has elapsed; a single trial request is then let through (half-open) and
+    its outcome decides whether the breaker closes again or re-opens.
+    """
+
+    def __init__(
+        self,
+        name="",
+        window_size=10,
+        min_calls=3,
+        failure_rate_threshold=0.5,
+        slow_call_ms=4000,
+        cool_down_s=60,
+        clock=time.monotonic,
+    ):
+        # type: (str, int, int, float, int, float, Callable[[], float]) -> None
+        self.name = name
+        self.window_size = max(1, window_size)
+        self.min_calls = max(1, min(min_calls, self.window_size))
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_ms = slow_call_ms
+        self.cool_down_s = cool_down_s
+
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__outcomes = deque(maxlen=self.window_size)  # type: deque[bool]
+        self.__state = BreakerState.CLOSED
+        self.__opened_at = 0.0
+        self.__trial_in_flight = False
+
+    @property
+    def state(self):
+        # type: () -> BreakerState
+        with self.__lock:
+            return self.__current_state()
+
+    def __current_state(self):
+        # type: () -> BreakerState
+        # Must be called with the lock held
+        if (
+            self.__state == BreakerState.OPEN
+            and self.__clock() - self.__opened_at >= self.cool_down_s
+        ):
+            self.__state = BreakerState.HALF_OPEN
+            self.__trial_in_flight = False
+        return self.__state
+
+    def allow_request(self):
+        # type: () -> bool
+        """True if the provider may be queried now. Only one caller is let through while half-open"""
+        with self.__lock:
+            state = self.__current_state()
+            if state == BreakerState.CLOSED:
+                return True
+            if state == BreakerState.HALF_OPEN and not self.__trial_in_flight:
+                self.__trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self, elapsed_ms):
+        # type: (float) -> None
+        if elapsed_ms > self.slow_call_ms:
+            self.record_failure()
+            return
+
+        with self.__lock:
+            if self.__current_state() == BreakerState.HALF_OPEN:
+                self.__close()
+            else:
+                self.__outcomes.append(True)
+
+    def record_failure(self):
+        # type: () -> None
+        with self.__lock:
+            if self.__current_state() == BreakerState.HALF_OPEN:
+                self.__open()
+                return
+
+            self.__outcomes.append(False)
+            if len(self.__outcomes) >= self.min_calls:
+                failures = self.__outcomes.count(False)
+                if failures / len(self.__outcomes) >= self.failure_rate_threshold:
+                    self.__open()
+
+    def reset(self):
+        # type: () -> None
+        with self.__lock:
+            self.__close()
+
+    def __open(self):
+        self.__state = BreakerState.OPEN
+        self.__opened_at = self.__clock()
+        self.__trial_in_flight = False
+
+    def __close(self):
+        self.__state = BreakerState.CLOSED
+        self.__outcomes.clear()
+        self.__trial_in_flight = False
+
+    def __repr__(self):
+        return f"CircuitBreaker(name={self.name}, state={self.state.name})"
@@ -6,6 +6,7 @@ class LyricSource(enum.Enum):
     LRCLib = enum.auto()
     MegaLobiz = enum.auto()
     NetEase = enum.auto()
+    LocalLibrary = enum.auto()
 
 
 class LRCEntry:
@@ -37,6 +38,7 @@ class LyricTime:
         self.mins = mins
         self.secs = secs
         self.ms = ms
+        self.__ms_cached = None
 
     def __str__(self):
         return f"{self.mins}:{self.secs}.{self.ms}"
@@ -231,11 +233,17 @@ class LyricTime:
 
 @dataclass
 class CustomDataClass:
+    __slots__ = ()
 
     def to_dict(self):
         return asdict(self)
 
-@dataclass(kw_only=True, repr=True, init=True)
+    def to_shallow_dict(self):
+        # type: () -> dict
+        """Like `to_dict`, but field values are not copied, so nested lists and dicts are shared"""
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+@dataclass(kw_only=True, repr=True, init=True, slots=True)
 class TrackDetails(CustomDataClass):
     name: str # Name of the track
     artists: list[str] # List of artists who performed the track
@@ -244,13 +252,34 @@ class TrackDetails(CustomDataClass):
     duration_ms: int # Track duration
     ms_remote: int = -1  # Remote progress in milliseconds if song is currently playing. (-1 if not playing)
     popularity: float = -1 # Track popularity
+    track_id: str = "" # Spotify id of the track or episode
+    album_art_url: str = "" # Largest available album (or show) art
+    album_images: tuple = () # Available album art as (width, url) pairs, largest first. Width is 0 if unknown
     meta: dict = field(default_factory=dict) # Meta information which provides some context for the currently playing track
         
+    @property
+    def identity(self):
+        # type: () -> tuple
+        """
+        Stable, hashable key for the track itself, independent of playback state.
+
+        The track id tells apart releases that share a name and artists (remasters, live versions, other albums).
+        Sources without ids fall back to the name, type and artists.
+        """
+        if self.track_id:
+            return (self.track_type, self.track_id)
+        return (self.name, self.track_type, tuple(self.artists))
+
     def __eq__(self, val):
         if isinstance(val, TrackDetails):
-            return val.name == self.name and self.track_type == val.track_type and val.artists == self.artists
-        raise TypeError("Cannot compare object of type %s" % type(val) + " to obejct of type %s" % type(self))
-    
+            return self.identity == val.identity
+        return NotImplemented
+
+    def __hash__(self):
+        # Consistent with `__eq__`. Don't change `track_id`, `name`, `track_type` or `artists`
+        # while the instance is in a set or used as a dict key
+        return hash(self.identity)
+
 
 if __name__ == "__main__":
 
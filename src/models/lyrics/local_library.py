@@ -0,0 +1,290 @@
+import os, logging, mmap, re, threading, hashlib, time, unicodedata
+from .utils import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    LRC_EXTENSION = ".lrc"
+    INDEX_VERSION = 2
+    DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".showlyrics")
+    RESCAN_INTERVAL_S = 60  # Lookups rescan the tree at most this often, so new files are picked up
+
+
+_TRACK_NUMBER_PREFIX = re.compile(r"^\d{1,3}\s*[-._)]?\s+")
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+_ARTIST_TAG = re.compile(r"^\[ar:(.*)\]\s*$", re.IGNORECASE | re.MULTILINE)
+
+
+def normalise_name(name):
+    # type: (str) -> str
+    """Lower-case, accent-fold and strip punctuation so that differently formatted names compare equal"""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", name.casefold()).strip()
+
+
+def _index_keys_for_stem(stem):
+    # type: (str) -> list[str]
+    # `01 - Title.lrc` and `Title.lrc` are both indexed under the title as well as the full stem
+    keys = [normalise_name(stem)]
+    stripped = _TRACK_NUMBER_PREFIX.sub("", stem)
+    if stripped != stem:
+        keys.append(normalise_name(stripped))
+    return [k for k in keys if k]
+
+
+def read_text_mmap(path):
+    # type: (str) -> str
+    with open(path, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode("utf-8-sig", errors="replace")
+
+
+class LocalLRCLibrary:
+    """
+    Lyrics provider backed by `.lrc` sidecar files in a local directory tree.
+
+    The library keeps a persistent index of normalised file name -> paths. Refreshing the index only
+    lists directories whose mtime changed since the previous scan, since adding, removing or renaming
+    a file always touches its parent directory. Lookups refresh the index every `rescan_interval_s`.
+
+    Files named after the title alone (`Title.lrc`) only match if their `[ar:]` tag names the artist,
+    or if they carry no artist tag and no other file shares the title. The artist tag is read once
+    per file and kept with its mtime and size, so it is only read again after the file changes.
+    """
+
+    def __init__(self, root_dir, index_path=None, rescan_interval_s=CONSTANTS.RESCAN_INTERVAL_S):
+        # type: (str, str | None, float) -> None
+        self.root_dir = os.path.abspath(root_dir)
+        self.rescan_interval_s = rescan_interval_s
+
+        if index_path is None:
+            digest = hashlib.sha1(self.root_dir.encode("utf-8")).hexdigest()[:12]
+            index_path = os.path.join(
+                CONSTANTS.DEFAULT_INDEX_DIR, f"lrc_index_{digest}.json"
+            )
+        self.index_path = index_path
+
+        self.__lock = threading.RLock()
+        self.__loaded = False
+        self.__refreshed_at = 0.0
+        self.__dirs = {}  # type: dict[str, dict]  # dir path -> {"mtime", "subdirs", "files"}
+        self.__files = {}  # type: dict[str, dict]  # file path -> {"mtime", "size", "keys", "artist"}
+        self.__names = {}  # type: dict[str, list[str]]  # normalised name -> file paths
+
+    def __len__(self):
+        return len(self.__files)
+
+    def get_lrc(self, track_name, artist_name):
+        # type: (str, str) -> str | None
+        """Return the contents of the matching `.lrc` file, or None if the library has no match"""
+        path = self.find(track_name, artist_name)
+        if path is None:
+            return None
+        try:
+            return read_text_mmap(path)
+        except OSError:
+            return None
+
+    def find(self, track_name, artist_name):
+        # type: (str, str) -> str | None
+        self.ensure_loaded()
+
+        track, artist = normalise_name(track_name), normalise_name(artist_name)
+        with self.__lock:
+            for key in (f"{artist} {track}", f"{track} {artist}"):
+                paths = self.__names.get(key, None)
+                if paths:
+                    return paths[0]
+
+            # A title alone may belong to any artist
+            paths = list(self.__names.get(track, ()))
+            untagged = []
+            for path in paths:
+                file_artist = self.__artist_of(path)
+                if file_artist == artist:
+                    return path
+                if file_artist is None:
+                    untagged.append(path)
+            if len(paths) == 1 and untagged:
+                return untagged[0]
+        return None
+
+    def __artist_of(self, path):
+        # type: (str) -> str | None
+        # Normalised `[ar:]` tag of the file, or None if it has none. Must be called with the lock held
+        info = self.__files[path]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if (
+            "artist" not in info
+            or info["mtime"] != stat.st_mtime_ns
+            or info["size"] != stat.st_size
+        ):
+            try:
+                match = _ARTIST_TAG.search(read_text_mmap(path))
+            except OSError:
+                return None
+            info["mtime"], info["size"] = stat.st_mtime_ns, stat.st_size
+            info["artist"] = normalise_name(match.group(1)) if match else None
+        return info["artist"]
+
+    def ensure_loaded(self):
+        # type: () -> None
+        """Load the index on first use, and refresh it once it is older than `rescan_interval_s`"""
+        with self.__lock:
+            if not self.__loaded:
+                self.load_index()
+                self.refresh()
+            elif time.monotonic() - self.__refreshed_at >= self.rescan_interval_s:
+                self.refresh()
+
+    def refresh(self):
+        # type: () -> bool
+        """Bring the index up to date with the file system. Returns True if anything changed"""
+        with self.__lock:
+            self.__loaded = True
+            self.__refreshed_at = time.monotonic()
+            seen_dirs = set()
+            changed = self.__scan_dir(self.root_dir, seen_dirs)
+
+            for removed in set(self.__dirs) - seen_dirs:
+                self.__forget_dir(removed)
+                changed = True
+
+            if changed:
+                self.save_index()
+            return changed
+
+    def __scan_dir(self, dir_path, seen_dirs):
+        # type: (str, set[str]) -> bool
+        seen_dirs.add(dir_path)
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return False
+
+        entry = self.__dirs.get(dir_path, None)
+        changed = False
+
+        if entry is None or entry["mtime"] != mtime:
+            changed = True
+            subdirs, files = [], []
+            try:
+                with os.scandir(dir_path) as it:
+                    for dir_entry in it:
+                        try:
+                            if dir_entry.is_dir(follow_symlinks=False):
+                                subdirs.append(dir_entry.path)
+                            elif dir_entry.name.lower().endswith(
+                                CONSTANTS.LRC_EXTENSION
+                            ) and dir_entry.is_file():
+                                stat = dir_entry.stat()
+                                files.append(dir_entry.path)
+                                self.__add_file(
+                                    dir_entry.path, stat.st_mtime_ns, stat.st_size
+                                )
+                        except OSError:
+                            continue
+            except OSError:
+                return False
+
+            if entry is not None:
+                for stale in set(entry["files"]) - set(files):
+                    self.__remove_file(stale)
+
+            entry = {"mtime": mtime, "subdirs": subdirs, "files": files}
+            self.__dirs[dir_path] = entry
+
+        for subdir in entry["subdirs"]:
+            changed = self.__scan_dir(subdir, seen_dirs) or changed
+
+        return changed
+
+    def __add_file(self, path, mtime, size, artist=...):
+        # type: (str, int, int, str | None) -> None
+        info = self.__files.get(path, None)
+        if info is not None:
+            if info["mtime"] == mtime and info["size"] == size:
+                return  # Unchanged, keep the artist tag read before
+            info.pop("artist", None)
+            info["mtime"], info["size"] = mtime, size
+            return
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        keys = _index_keys_for_stem(stem)
+        info = {"mtime": mtime, "size": size, "keys": keys}
+        if artist is not ...:
+            info["artist"] = artist
+        self.__files[path] = info
+        for key in keys:
+            self.__names.setdefault(key, []).append(path)
+
+    def __remove_file(self, path):
+        # type: (str) -> None
+        info = self.__files.pop(path, None)
+        if info is None:
+            return
+        for key in info["keys"]:
+            paths = self.__names.get(key, None)
+            if paths is not None and path in paths:
+                paths.remove(path)
+                if not paths:
+                    del self.__names[key]
+
+    def __forget_dir(self, dir_path):
+        # type: (str) -> None
+        entry = self.__dirs.pop(dir_path, None)
+        if entry is not None:
+            for path in entry["files"]:
+                self.__remove_file(path)
+
+    def load_index(self):
+        # type: () -> bool
+        # Returns True if a persisted index for this root was loaded
+        data = read_json(self.index_path, None)
+        if not isinstance(data, dict):
+            return False
+
+        if (
+            data.get("version", None) != CONSTANTS.INDEX_VERSION
+            or data.get("root", None) != self.root_dir
+        ):
+            return False
+
+        with self.__lock:
+            self.__dirs = data.get("dirs", {})
+            self.__files = {}
+            self.__names = {}
+            for path, info in data.get("files", {}).items():
+                self.__add_file(
+                    path, info["mtime"], info["size"], info.get("artist", ...)
+                )
+        return True
+
+    def save_index(self):
+        # type: () -> None
+        files = {}
+        for path, info in self.__files.items():
+            files[path] = {"mtime": info["mtime"], "size": info["size"]}
+            if "artist" in info:
+                files[path]["artist"] = info["artist"]
+
+        data = {
+            "version": CONSTANTS.INDEX_VERSION,
+            "root": self.root_dir,
+            "dirs": self.__dirs,
+            "files": files,
+        }
+        try:
+            atomic_write_json(self.index_path, data)
+        except OSError:
+            # The index is rebuilt on the next start up
+            logger.warning("Saving the LRC index to %s failed", self.index_path, exc_info=True)
@@ -0,0 +1,126 @@
+import enum, re
+from .data_types import LRCEntry, LyricTime
+
+
+class CONSTANTS:
+    __slots__ = ()
+    MAX_LRC_MS = 60 * 60 * 1000  # LyricTime can only represent times below an hour
+    MAX_UNSYNCED_RATIO = 0.5  # Reject lyrics where more than this share of lines have no timestamp
+
+
+class LRCRejection(enum.Enum):
+    EMPTY = "Lyrics are empty"
+    NOT_SYNCED = "Lyrics contain no time-synced lines"
+    MOSTLY_UNSYNCED = "Most lyric lines have no timestamp"
+
+
+# [mm:ss], [mm:ss.x], [mm:ss.xx], [mm:ss.xxx] and [mm:ss:xx]
+_TIMESTAMP = re.compile(r"\[(\d{1,3}):(\d{1,2})(?:[.:](\d{1,3}))?\]")
+_TAG = re.compile(r"^\[([A-Za-z#]+):(.*)\]\s*$")
+
+
+class LRCParseResult:
+    """Outcome of `parse_lrc`. Truthy when the lyrics are valid and `entries` holds the timeline"""
+
+    __slots__ = ("entries", "tags", "rejection")
+
+    def __init__(self, entries=None, tags=None, rejection=None):
+        # type: (list[LRCEntry] | None, dict[str, str] | None, LRCRejection | None) -> None
+        self.entries = entries if entries is not None else []
+        self.tags = tags if tags is not None else {}
+        self.rejection = rejection
+
+    def is_valid(self):
+        # type: () -> bool
+        return self.rejection is None
+
+    def __bool__(self):
+        return self.is_valid()
+
+    def __repr__(self):
+        if self.rejection is not None:
+            return f"LRCParseResult(rejection={self.rejection.name})"
+        return f"LRCParseResult(entries={len(self.entries)})"
+
+
+def _fraction_to_ms(fraction):
+    # type: (str | None) -> int
+    # `.5` is half a second, `.05` is 50ms and `.005` is 5ms
+    if not fraction:
+        return 0
+    return int(fraction) * (10 ** (3 - len(fraction)))
+
+
+def parse_lrc(lrc_string):
+    # type: (str | None) -> LRCParseResult
+    """
+    Validate and parse LRC lyrics in a single pass over the text.
+
+    Lines may carry several timestamps (`[00:10.00][00:42.00]Chorus`), ID tags such as `[ar:Artist]`
+    are collected into `tags`, and an `[offset:+/-ms]` tag is applied to every timestamp.
+    """
+    if not lrc_string or not lrc_string.strip():
+        return LRCParseResult(rejection=LRCRejection.EMPTY)
+
+    timed = []  # type: list[tuple[int, str]]
+    tags = {}
+    unsynced_lines = 0
+    synced_lines = 0
+    timestamp_match = _TIMESTAMP.match
+
+    for line in lrc_string.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        pos = 0
+        times = []
+        match = timestamp_match(line, pos)
+        while match is not None:
+            mins, secs, fraction = match.groups()
+            times.append(
+                int(mins) * 60000 + int(secs) * 1000 + _fraction_to_ms(fraction)
+            )
+            pos = match.end()
+            match = timestamp_match(line, pos)
+
+        if times:
+            synced_lines += 1
+            lyric = line[pos:].strip()
+            for ms in times:
+                timed.append((ms, lyric))
+            continue
+
+        tag = _TAG.match(line)
+        if tag is not None:
+            tags[tag.group(1).lower()] = tag.group(2).strip()
+        else:
+            unsynced_lines += 1
+
+    if not synced_lines:
+        return LRCParseResult(tags=tags, rejection=LRCRejection.NOT_SYNCED)
+
+    if unsynced_lines / (synced_lines + unsynced_lines) > CONSTANTS.MAX_UNSYNCED_RATIO:
+        return LRCParseResult(tags=tags, rejection=LRCRejection.MOSTLY_UNSYNCED)
+
+    try:
+        offset = int(tags.get("offset", "0"))
+    except ValueError:
+        offset = 0
+
+    timed.sort(key=lambda t: t[0])
+
+    entries = []
+    for ms, lyric in timed:
+        # A positive offset shifts lyrics earlier
+        ms = max(0, ms - offset)
+        if ms >= CONSTANTS.MAX_LRC_MS:
+            continue
+        entries.append(
+            LRCEntry(
+                lyric,
+                LyricTime((ms // 60000) % 60, (ms // 1000) % 60, ms % 1000),
+            )
+        )
+
+    return LRCParseResult(entries, tags)
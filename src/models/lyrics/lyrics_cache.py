@@ -0,0 +1,332 @@
+import logging, threading, time, hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from .api import get_lrc_lyrics
+from .local_library import LocalLRCLibrary, normalise_name
+from .lrc_parser import parse_lrc, LRCParseResult
+from .utils import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    CACHE_VERSION = 2
+    DAY_S = 24 * 60 * 60
+    SAVE_DELAY_S = 2.0  # Changes made within this window are written to disk together
+
+
+class CachePolicy:
+    """
+    Controls how `LyricsCache` balances freshness against waiting on the network.
+
+    ttl_s: Age after which a found lyric is considered stale
+    negative_ttl_s: Age after which a "no lyrics found" result is considered stale
+    stale_while_revalidate: Return stale entries immediately and refresh them in the background
+    offline: Never query network providers. Only the cache and the local library are used
+    """
+
+    __slots__ = ("ttl_s", "negative_ttl_s", "stale_while_revalidate", "offline")
+
+    def __init__(
+        self,
+        ttl_s=30 * CONSTANTS.DAY_S,
+        negative_ttl_s=CONSTANTS.DAY_S,
+        stale_while_revalidate=True,
+        offline=False,
+    ):
+        # type: (float, float, bool, bool) -> None
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.stale_while_revalidate = stale_while_revalidate
+        self.offline = offline
+
+    def is_stale(self, entry, now):
+        # type: (dict, float) -> bool
+        ttl = self.ttl_s if entry["hash"] else self.negative_ttl_s
+        return now - entry["fetched_at"] > ttl
+
+
+class LyricsCache:
+    """
+    Cache in front of `get_lrc_lyrics`, optionally persisted to a JSON file.
+
+    LRC bodies are content addressed: each unique body is stored (and parsed) once under its hash,
+    and every track key that resolved to it only holds the hash.
+
+    Stale entries are served immediately while a background refresh is scheduled, so a slow or
+    unreachable upstream never delays showing lyrics that were seen before.
+
+    Changes are written to disk `SAVE_DELAY_S` after the first of them, from a snapshot taken under the lock,
+    so lookups never wait on disk I/O. Call `close` to write any pending changes.
+    """
+
+    def __init__(
+        self,
+        cache_path=None,
+        policy=None,
+        local_library=None,
+        on_refreshed=None,
+        fetch=get_lrc_lyrics,
+        clock=time.time,
+    ):
+        # type: (str | None, CachePolicy | None, LocalLRCLibrary | None, Callable[[str, str, dict], None] | None, Callable[..., dict], Callable[[], float]) -> None
+        self.cache_path = cache_path
+        self.policy = policy if policy is not None else CachePolicy()
+        self.local_library = local_library
+        self.on_refreshed = on_refreshed  # Called with (track_name, artist_name, result) when a refresh changed the lyrics
+
+        self.__fetch = fetch
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__entries = {}  # type: dict[str, dict]  # track key -> {"hash", "source", "fetched_at"}
+        self.__bodies = {}  # type: dict[str, str]  # content hash -> LRC body
+        self.__parsed = {}  # type: dict[str, LRCParseResult]  # content hash -> timeline, kept in memory only
+        self.__refcounts = {}  # type: dict[str, int]  # content hash -> number of track keys using it
+        self.__refreshing = set()  # type: set[str]
+        self.__save_lock = threading.Lock()  # Serialises writes, which happen outside `__lock`
+        self.__save_timer = None  # type: threading.Timer | None
+        self.__snapshots = 0  # Number of snapshots taken, so an older snapshot never overwrites a newer one
+        self.__written = 0
+        self.__executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="LyricsCacheRefresh"
+        )
+
+        if cache_path:
+            self.load()
+
+    def set_offline(self, offline):
+        # type: (bool) -> None
+        self.policy.offline = bool(offline)
+
+    def is_offline(self):
+        # type: () -> bool
+        return self.policy.offline
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def unique_bodies(self):
+        # type: () -> int
+        return len(self.__bodies)
+
+    @staticmethod
+    def content_hash(lrc_string):
+        # type: (str) -> str
+        return hashlib.sha256(lrc_string.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_key(track_name, artist_name):
+        # type: (str, str) -> str
+        return normalise_name(track_name) + "\x1f" + normalise_name(artist_name)
+
+    def get_lrc_lyrics(self, track_name, artist_name):
+        # type: (str, str) -> dict[str, str | LRCParseResult | None]
+        """Same result as `get_lrc_lyrics`, served from the cache whenever possible"""
+        key = self.make_key(track_name, artist_name)
+        now = self.__clock()
+
+        with self.__lock:
+            entry = self.__entries.get(key, None)
+
+        if entry is not None:
+            if self.policy.is_stale(entry, now) and not self.policy.offline:
+                if self.policy.stale_while_revalidate:
+                    self.__schedule_refresh(key, track_name, artist_name)
+                else:
+                    return self.__refresh(key, track_name, artist_name)
+            return self.__to_result(entry)
+
+        if self.policy.offline:
+            # Local files never block on the network, but the miss isn't cached so
+            # the track is fetched properly once back online
+            return self.__fetch(
+                track_name,
+                artist_name,
+                local_library=self.local_library,
+                use_network=False,
+            )
+
+        return self.__refresh(key, track_name, artist_name)
+
+    def invalidate(self, track_name, artist_name):
+        # type: (str, str) -> None
+        key = self.make_key(track_name, artist_name)
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is not None:
+                self.__release_body(entry["hash"])
+        self.schedule_save()
+
+    def __schedule_refresh(self, key, track_name, artist_name):
+        # type: (str, str, str) -> None
+        with self.__lock:
+            if key in self.__refreshing:
+                return
+            self.__refreshing.add(key)
+
+        def task():
+            try:
+                old = self.__entries.get(key, None)
+                result = self.__refresh(key, track_name, artist_name)
+                if callable(self.on_refreshed) and (
+                    old is None or old["hash"] != self.__hash_of(result["lrc"])
+                ):
+                    self.on_refreshed(track_name, artist_name, result)
+            except Exception:
+                # The stale entry stays in use
+                logger.warning(
+                    "Refreshing lyrics of %r by %r failed", track_name, artist_name, exc_info=True
+                )
+            finally:
+                with self.__lock:
+                    self.__refreshing.discard(key)
+
+        self.__executor.submit(task)
+
+    def __refresh(self, key, track_name, artist_name):
+        # type: (str, str, str) -> dict[str, str | LRCParseResult | None]
+        result = self.__fetch(track_name, artist_name, local_library=self.local_library)
+
+        lrc = result["lrc"]
+        content_hash = self.__hash_of(lrc)
+
+        with self.__lock:
+            old = self.__entries.get(key, None)
+            if content_hash is None and old is not None and old["hash"]:
+                # Never replace lyrics we have with a miss, which is usually a provider outage
+                old["fetched_at"] = self.__clock()
+                entry = old
+            else:
+                if content_hash is not None and content_hash not in self.__bodies:
+                    self.__bodies[content_hash] = lrc
+                    if result.get("parsed", None) is not None:
+                        self.__parsed[content_hash] = result["parsed"]
+
+                entry = {
+                    "hash": content_hash,
+                    "source": result["source"],
+                    "fetched_at": self.__clock(),
+                }
+                self.__entries[key] = entry
+                self.__retain_body(content_hash)
+                if old is not None:
+                    self.__release_body(old["hash"])
+
+        self.schedule_save()
+        return self.__to_result(entry)
+
+    def __hash_of(self, lrc_string):
+        # type: (str | None) -> str | None
+        return self.content_hash(lrc_string) if lrc_string else None
+
+    def __retain_body(self, content_hash):
+        # type: (str | None) -> None
+        # Must be called with the lock held
+        if content_hash is not None:
+            self.__refcounts[content_hash] = self.__refcounts.get(content_hash, 0) + 1
+
+    def __release_body(self, content_hash):
+        # type: (str | None) -> None
+        # Must be called with the lock held. Drops a body once no track key refers to it
+        if content_hash is None:
+            return
+        count = self.__refcounts.get(content_hash, 0) - 1
+        if count > 0:
+            self.__refcounts[content_hash] = count
+            return
+        self.__refcounts.pop(content_hash, None)
+        self.__bodies.pop(content_hash, None)
+        self.__parsed.pop(content_hash, None)
+
+    def __to_result(self, entry):
+        # type: (dict) -> dict[str, str | LRCParseResult | None]
+        content_hash = entry["hash"]
+        lrc, parsed = None, None
+
+        if content_hash is not None:
+            with self.__lock:
+                lrc = self.__bodies.get(content_hash, None)
+                parsed = self.__parsed.get(content_hash, None)
+            if lrc is not None and parsed is None:
+                # Every track key sharing this body shares the parsed timeline too
+                with self.__lock:
+                    parsed = self.__parsed.setdefault(content_hash, parse_lrc(lrc))
+
+        return {"lrc": lrc, "source": entry["source"], "parsed": parsed}
+
+    def load(self):
+        # type: () -> bool
+        data = read_json(self.cache_path, None)
+        if (
+            not isinstance(data, dict)
+            or data.get("version", None) != CONSTANTS.CACHE_VERSION
+        ):
+            return False
+
+        with self.__lock:
+            self.__bodies.update(data.get("bodies", {}))
+            for key, entry in data.get("entries", {}).items():
+                if entry["hash"] is None or entry["hash"] in self.__bodies:
+                    old = self.__entries.get(key, None)
+                    self.__entries[key] = entry
+                    self.__retain_body(entry["hash"])
+                    if old is not None:
+                        self.__release_body(old["hash"])
+
+            # Bodies no entry refers to would otherwise be kept, and saved, forever
+            for content_hash in list(self.__bodies):
+                if content_hash not in self.__refcounts:
+                    del self.__bodies[content_hash]
+                    self.__parsed.pop(content_hash, None)
+        return True
+
+    def schedule_save(self):
+        # type: () -> None
+        """Write the cache to disk shortly, together with any other change made in the meantime"""
+        if not self.cache_path:
+            return
+
+        with self.__lock:
+            if self.__save_timer is not None:
+                return
+            timer = threading.Timer(CONSTANTS.SAVE_DELAY_S, self.save)
+            timer.daemon = True
+            self.__save_timer = timer
+        timer.start()
+
+    def save(self):
+        # type: () -> None
+        """Write the cache to disk now"""
+        if not self.cache_path:
+            return
+
+        with self.__lock:
+            if self.__save_timer is not None:
+                self.__save_timer.cancel()
+                self.__save_timer = None
+
+            self.__snapshots += 1
+            snapshot = self.__snapshots
+            data = {
+                "version": CONSTANTS.CACHE_VERSION,
+                "entries": {key: dict(entry) for key, entry in self.__entries.items()},
+                "bodies": dict(self.__bodies),
+            }
+
+        with self.__save_lock:
+            if snapshot < self.__written:
+                return  # A newer snapshot is already on disk
+            try:
+                atomic_write_json(self.cache_path, data)
+                self.__written = snapshot
+            except OSError:
+                logger.warning("Saving the lyrics cache to %s failed", self.cache_path, exc_info=True)
+
+    def close(self):
+        # type: () -> None
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+        with self.__lock:
+            pending = self.__save_timer is not None
+        if pending:
+            self.save()
@@ -1,51 +1,126 @@
 from PySide6.QtCore import QObject
-from api import get_lrc_lyrics
-from data_types import LRCEntry, LyricSource, LyricTime
-from datetime import datetime
+from bisect import bisect_right
+import atexit, threading
+from .api import LYRICS_CACHE_PATH, LYRICS_OFFLINE, get_local_library
+from .data_types import LRCEntry, LyricSource, LyricTime, TrackDetails
+from .lrc_parser import parse_lrc, LRCParseResult
+from .lyrics_cache import CachePolicy, LyricsCache
+from .playback_clock import PlaybackClock
+
 
 class LRCLyrics:
-    def __init__(self, lrc_string, source):
-        # type: (str, str) -> None
-        pass
-    
-    @staticmethod
-    def __process_lrc_string(lrc_string):
-        # type: (str) -> LRCLyrics
-        lyrics = lrc_string.splitlines()
+    def __init__(self, lrc_string, source, parsed=None):
+        # type: (str, str, LRCParseResult | None) -> None
+        """Time-synced lyrics. Pass `parsed` when the lyrics were already parsed to skip parsing them again"""
+        if parsed is None:
+            parsed = parse_lrc(lrc_string)
+
+        self.lrc_string = lrc_string
+        self.source = source
+        self.tags = parsed.tags
+        self.entries = parsed.entries  # type: list[LRCEntry]
+        self.__times = [entry.time.to_milliseconds() for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def index_at(self, ms):
+        # type: (int) -> int
+        """Index of the lyric line being sung at `ms`, or -1 before the first line"""
+        return bisect_right(self.__times, ms) - 1
+
+    def entry_at(self, ms):
+        # type: (int) -> LRCEntry | None
+        i = self.index_at(ms)
+        return self.entries[i] if i >= 0 else None
+
+
+_LYRICS_CACHE = None  # type: LyricsCache | None
+_LYRICS_CACHE_LOCK = threading.Lock()
 
-        def process(lrc_lyric):
-            # type: (str) -> tuple[datetime, str]
 
-            time_format = "[%M:%S.%f]"
+def get_lyrics_cache():
+    # type: () -> LyricsCache
+    """
+    Return the lyrics cache shared by this process, creating it on first use.
 
-            i = lrc_lyric.find(']')
-            lyric_str = lrc_lyric[i+1:].strip()
-            time_str = lrc_lyric[:i+1].strip()
+    It is persisted to `LYRICS_CACHE_PATH`, searches the local library first and
+    never queries providers while `LYRICS_OFFLINE` is set. Pending changes are written at exit.
+    """
+    global _LYRICS_CACHE
 
-            t = LyricTime.strptime(time_str, time_format)
+    with _LYRICS_CACHE_LOCK:
+        if _LYRICS_CACHE is None:
+            _LYRICS_CACHE = LyricsCache(
+                LYRICS_CACHE_PATH,
+                CachePolicy(offline=LYRICS_OFFLINE),
+                local_library=get_local_library(),
+            )
+            # Saves are debounced on a daemon timer, which would be dropped at exit
+            atexit.register(_LYRICS_CACHE.close)
+        return _LYRICS_CACHE
 
-            # TODO: Continue Lyrics View Model
-            
 
 def get_lyrics(track_name, artist_name):
-    # type: (str, str) -> LRCLyrics
-    pass
+    # type: (str, str) -> LRCLyrics | None
+    result = get_lyrics_cache().get_lrc_lyrics(track_name, artist_name)
+
+    if result["lrc"] is None:
+        return None
+
+    return LRCLyrics(result["lrc"], result["source"], result["parsed"])
 
-    lrc = get_lrc_lyrics(track_name, artist_name)
 
-    lyric = LRCLyrics()
 class LyricsViewModel(QObject):
     """Manage lyrics information, providing endpoints for Views to retrieve time-synced lyrics and/or full lyrics for songs"""
 
-    def __init__(self, track_name=None, artist_name=None, lyrics=None) -> None:
-        # type: (str|None, str|None, LRCLyrics) -> None
+    def __init__(self, track_name=None, artist_name=None, lyrics=None, clock=None) -> None:
+        # type: (str|None, str|None, LRCLyrics, PlaybackClock | None) -> None
         """Create a new LyricsViewModel instance
 
         Args:
             track_name (str, optional): Track Name. Defaults to None.
             artist_name (str, optional): Artist Name for the specified track. Defaults to None.
-            lyrics (LRCLyrics, optional): Lyrics Data - Specifying this parameter 
+            lyrics (LRCLyrics, optional): Lyrics Data - Specifying this parameter
                             prevents the object from making an API call. Defaults to None.
+            clock (PlaybackClock, optional): Latency corrected playback clock. Defaults to a new PlaybackClock.
         """
         super().__init__()
 
+        self.track_name = track_name
+        self.artist_name = artist_name
+
+        if lyrics is None and track_name and artist_name:
+            lyrics = get_lyrics(track_name, artist_name)
+        self.lyrics = lyrics  # type: LRCLyrics | None
+        self.clock = clock if clock is not None else PlaybackClock()
+
+    def update_playback(self, track, sent_at, received_at):
+        # type: (TrackDetails, float, float) -> None
+        """Feed a poll result, with the `clock.now()` readings taken around the request, into the playback clock"""
+        self.clock.record(
+            track.ms_remote,
+            track.is_playing,
+            sent_at,
+            received_at,
+            track.duration_ms,
+            track.identity,
+        )
+
+    def position_ms(self):
+        # type: () -> int
+        return self.clock.position_ms()
+
+    def current_lyric(self):
+        # type: () -> LRCEntry | None
+        """Lyric line at the latency corrected playback position"""
+        position = self.clock.position_ms()
+        if position < 0:
+            return None
+        return self.lyric_at(position)
+
+    def lyric_at(self, ms):
+        # type: (int) -> LRCEntry | None
+        if self.lyrics is None:
+            return None
+        return self.lyrics.entry_at(ms)
@@ -0,0 +1,315 @@
+import threading, time
+from typing import Callable
+from .data_types import TrackDetails
+from .spotify_session import PlaybackStatus, PollResult
+
+import gi
+
+gi.require_version("Gio", "2.0")
+from gi.repository import Gio, GLib
+
+
+class CONSTANTS:
+    __slots__ = ()
+    BUS_NAME_PREFIX = "org.mpris.MediaPlayer2."
+    OBJECT_PATH = "/org/mpris/MediaPlayer2"
+    PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+    PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+    CALL_TIMEOUT_MS = 500
+    START_TIMEOUT_S = 5
+
+
+def track_details_from_metadata(metadata, playback_status, position_us):
+    # type: (dict, str, int) -> TrackDetails | None
+    """Build `TrackDetails` from MPRIS `Metadata`, `PlaybackStatus` and `Position` values"""
+    if not metadata or playback_status == "Stopped":
+        return None
+
+    track_id = str(metadata.get("mpris:trackid", ""))
+    length_us = metadata.get("mpris:length", -1)
+
+    art_url = metadata.get("mpris:artUrl", "")
+
+    return TrackDetails(
+        name=metadata.get("xesam:title", ""),
+        artists=list(metadata.get("xesam:artist", [])),
+        is_playing=playback_status == "Playing",
+        track_type="ad" if "/ad/" in track_id else "track",
+        duration_ms=length_us // 1000 if length_us and length_us > 0 else -1,
+        ms_remote=position_us // 1000 if position_us >= 0 else -1,
+        # `NoTrack` is MPRIS' placeholder id, which would make every track look the same
+        track_id="" if track_id.endswith("/NoTrack") else track_id.rsplit("/", 1)[-1],
+        album_art_url=art_url,
+        album_images=((0, art_url),) if art_url else (),
+    )
+
+
+class MprisPlaybackSource:
+    """
+    Playback source reading a local media player over MPRIS (D-Bus), as a push alternative to Spotify polling.
+
+    The source subscribes to the player's `PropertiesChanged` and `Seeked` signals on a private GLib main
+    loop thread, so track and play state changes arrive without any web API calls. MPRIS doesn't signal
+    position changes during playback, so the position is extrapolated from the last known value.
+
+    `poll` returns the same `PollResult` as `PlaybackSession.poll`, so either can drive `PlaybackWorker`.
+    """
+
+    def __init__(self, player_name="spotify", bus_address=None, on_change=None, clock=time.monotonic):
+        # type: (str, str | None, Callable[[], None] | None, Callable[[], float]) -> None
+        """
+        player_name: Suffix of the player's bus name, e.g. `spotify` for `org.mpris.MediaPlayer2.spotify`
+        bus_address: D-Bus address to connect to instead of the session bus (e.g. a private `dbus-daemon`)
+        on_change: Called from the D-Bus thread whenever the player reports a change
+        """
+        self.bus_name = CONSTANTS.BUS_NAME_PREFIX + player_name
+        self.bus_address = bus_address
+        self.on_change = on_change
+
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__metadata = {}  # type: dict
+        self.__status = "Stopped"
+        self.__position_us = -1
+        self.__position_at = 0.0
+        self.__rate = 1.0
+
+        self.__context = None  # type: GLib.MainContext | None
+        self.__loop = None  # type: GLib.MainLoop | None
+        self.__connection = None  # type: Gio.DBusConnection | None
+        self.__thread = None  # type: threading.Thread | None
+        self.__subscriptions = []  # type: list[int]
+
+    def start(self):
+        # type: () -> MprisPlaybackSource
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            # Signals are dispatched to the thread-default context of the thread that subscribed
+            self.__context = GLib.MainContext.new()
+            self.__context.push_thread_default()
+            try:
+                self.__connect()
+                self.__loop = GLib.MainLoop.new(self.__context, False)
+            except GLib.Error as e:
+                errors.append(e)
+            ready.set()
+
+            if self.__loop is not None:
+                self.__loop.run()
+            self.__context.pop_thread_default()
+
+        self.__thread = threading.Thread(target=run, name="MprisPlaybackSource", daemon=True)
+        self.__thread.start()
+        ready.wait(CONSTANTS.START_TIMEOUT_S)
+
+        if errors:
+            raise errors[0]
+        return self
+
+    def close(self):
+        # type: () -> None
+        if self.__connection is not None:
+            for subscription in self.__subscriptions:
+                self.__connection.signal_unsubscribe(subscription)
+            self.__subscriptions.clear()
+        if self.__loop is not None:
+            self.__loop.quit()
+        if self.__thread is not None:
+            self.__thread.join(CONSTANTS.START_TIMEOUT_S)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __connect(self):
+        if self.bus_address:
+            self.__connection = Gio.DBusConnection.new_for_address_sync(
+                self.bus_address,
+                Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
+                | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+                None,
+                None,
+            )
+        else:
+            self.__connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+
+        flags = Gio.DBusSignalFlags.NONE
+        self.__subscriptions = [
+            self.__connection.signal_subscribe(
+                self.bus_name,
+                CONSTANTS.PROPERTIES_INTERFACE,
+                "PropertiesChanged",
+                CONSTANTS.OBJECT_PATH,
+                CONSTANTS.PLAYER_INTERFACE,
+                flags,
+                self.__on_properties_changed,
+            ),
+            self.__connection.signal_subscribe(
+                self.bus_name,
+                CONSTANTS.PLAYER_INTERFACE,
+                "Seeked",
+                CONSTANTS.OBJECT_PATH,
+                None,
+                flags,
+                self.__on_seeked,
+            ),
+            # Players come and go. Reload everything when the bus name changes owner
+            self.__connection.signal_subscribe(
+                "org.freedesktop.DBus",
+                "org.freedesktop.DBus",
+                "NameOwnerChanged",
+                "/org/freedesktop/DBus",
+                self.bus_name,
+                flags,
+                self.__on_owner_changed,
+            ),
+        ]
+        self.__load_all()
+
+    def __call_player(self, interface, method, parameters, reply_type):
+        # type: (str, str, GLib.Variant | None, str | None) -> GLib.Variant | None
+        try:
+            return self.__connection.call_sync(
+                self.bus_name,
+                CONSTANTS.OBJECT_PATH,
+                interface,
+                method,
+                parameters,
+                GLib.VariantType.new(reply_type) if reply_type else None,
+                Gio.DBusCallFlags.NO_AUTO_START,
+                CONSTANTS.CALL_TIMEOUT_MS,
+                None,
+            )
+        except GLib.Error:
+            return None
+
+    def __command(self, method, parameters=None):
+        # type: (str, GLib.Variant | None) -> None
+        # Unlike `__call_player`, failures are raised so the caller can roll back
+        self.__connection.call_sync(
+            self.bus_name,
+            CONSTANTS.OBJECT_PATH,
+            CONSTANTS.PLAYER_INTERFACE,
+            method,
+            parameters,
+            None,
+            Gio.DBusCallFlags.NO_AUTO_START,
+            CONSTANTS.CALL_TIMEOUT_MS,
+            None,
+        )
+
+    def __load_all(self):
+        reply = self.__call_player(
+            CONSTANTS.PROPERTIES_INTERFACE,
+            "GetAll",
+            GLib.Variant("(s)", (CONSTANTS.PLAYER_INTERFACE,)),
+            "(a{sv})",
+        )
+        properties = reply.unpack()[0] if reply is not None else {}
+
+        with self.__lock:
+            self.__metadata = properties.get("Metadata", {})
+            self.__status = properties.get("PlaybackStatus", "Stopped")
+            self.__rate = properties.get("Rate", 1.0)
+            self.__set_position(properties.get("Position", -1))
+        self.__notify()
+
+    def __query_position(self):
+        reply = self.__call_player(
+            CONSTANTS.PROPERTIES_INTERFACE,
+            "Get",
+            GLib.Variant("(ss)", (CONSTANTS.PLAYER_INTERFACE, "Position")),
+            "(v)",
+        )
+        if reply is not None:
+            with self.__lock:
+                self.__set_position(reply.unpack()[0])
+
+    def __set_position(self, position_us):
+        # type: (int) -> None
+        # Must be called with the lock held
+        self.__position_us = position_us
+        self.__position_at = self.__clock()
+
+    def __on_properties_changed(self, connection, sender, path, interface, signal, parameters):
+        _, changed, invalidated = parameters.unpack()
+
+        if "Metadata" in invalidated or "PlaybackStatus" in invalidated:
+            self.__load_all()
+            return
+
+        with self.__lock:
+            # Freeze the extrapolated position at the moment playback state changes
+            position_us = self.__current_position_us()
+            if "Metadata" in changed:
+                self.__metadata = changed["Metadata"]
+                position_us = 0
+            if "PlaybackStatus" in changed:
+                self.__status = changed["PlaybackStatus"]
+            if "Rate" in changed:
+                self.__rate = changed["Rate"]
+            self.__set_position(position_us)
+
+        if "Metadata" in changed or "PlaybackStatus" in changed:
+            # Players report the exact position on request, which corrects the estimate above
+            self.__query_position()
+        self.__notify()
+
+    def __on_seeked(self, connection, sender, path, interface, signal, parameters):
+        with self.__lock:
+            self.__set_position(parameters.unpack()[0])
+        self.__notify()
+
+    def __on_owner_changed(self, connection, sender, path, interface, signal, parameters):
+        self.__load_all()
+
+    def __notify(self):
+        if callable(self.on_change):
+            self.on_change()
+
+    def __current_position_us(self):
+        # type: () -> int
+        # Must be called with the lock held
+        if self.__position_us < 0 or self.__status != "Playing":
+            return self.__position_us
+        elapsed_us = (self.__clock() - self.__position_at) * 1_000_000 * self.__rate
+        return int(self.__position_us + elapsed_us)
+
+    def current(self):
+        # type: () -> TrackDetails | None
+        """The player's current track, in the same shape as `get_currently_playing_song`"""
+        with self.__lock:
+            return track_details_from_metadata(
+                self.__metadata, self.__status, self.__current_position_us()
+            )
+
+    def play(self):
+        # type: () -> None
+        self.__command("Play")
+
+    def pause(self):
+        # type: () -> None
+        self.__command("Pause")
+
+    def seek(self, position_ms):
+        # type: (int) -> None
+        with self.__lock:
+            track_id = self.__metadata.get("mpris:trackid", "")
+        if not track_id:
+            raise ValueError("The player has no track loaded")
+        # SetPosition is ignored by players unless the track id matches the current track
+        self.__command(
+            "SetPosition",
+            GLib.Variant("(ox)", (str(track_id), max(0, int(position_ms)) * 1000)),
+        )
+
+    def poll(self):
+        # type: () -> PollResult
+        track = self.current()
+        if track is None:
+            return PollResult(PlaybackStatus.NOTHING_PLAYING)
+        return PollResult(PlaybackStatus.OK, track)
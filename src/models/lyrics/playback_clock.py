@@ -0,0 +1,180 @@
+import threading, time
+from collections import deque
+from statistics import pstdev
+from typing import Callable, Hashable
+
+
+class CONSTANTS:
+    __slots__ = ()
+    WINDOW_SIZE = 8  # Number of recent samples used for the estimate
+    DISCONTINUITY_MS = 1500  # Larger jumps are seeks rather than jitter
+    CONFIDENT_SAMPLES = 3
+    CONFIDENCE_SCALE_MS = 100  # Uncertainty at which confidence halves
+
+
+class ClockSample:
+    __slots__ = ("rtt_ms", "offset_ms")
+
+    def __init__(self, rtt_ms, offset_ms):
+        # type: (float, float) -> None
+        self.rtt_ms = rtt_ms
+        self.offset_ms = offset_ms  # Playback position minus local clock, in milliseconds
+
+
+class PlaybackClock:
+    """
+    Estimate the true playback position from `TrackDetails.ms_remote` samples.
+
+    Like NTP, each request is timestamped when it is sent and when the response arrives. The remote
+    position is assumed to have been taken halfway through the round trip, so it is ahead by half the
+    round trip time when the response is received. Samples are kept relative to the local monotonic
+    clock and the one with the smallest round trip wins, since it carries the least queueing delay.
+    Jumps that jitter can't explain (seeks, skips) start a fresh set of samples.
+    """
+
+    def __init__(
+        self,
+        window_size=CONSTANTS.WINDOW_SIZE,
+        discontinuity_ms=CONSTANTS.DISCONTINUITY_MS,
+        clock=time.monotonic,
+    ):
+        # type: (int, float, Callable[[], float]) -> None
+        self.discontinuity_ms = discontinuity_ms
+
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__samples = deque(maxlen=max(1, window_size))  # type: deque[ClockSample]
+        self.__track_key = None  # type: Hashable | None
+        self.__is_playing = False
+        self.__paused_position_ms = -1
+        self.__duration_ms = -1
+        self.__local = False  # The samples come from `apply_local`, not from the remote
+
+    @property
+    def is_playing(self):
+        # type: () -> bool
+        return self.__is_playing
+
+    def now(self):
+        # type: () -> float
+        return self.__clock()
+
+    def record(self, ms_remote, is_playing, sent_at, received_at, duration_ms=-1, track_key=None):
+        # type: (int, bool, float, float, int, Hashable | None) -> None
+        """
+        Add a sample. `sent_at` and `received_at` are readings of this clock's time source (`now()`)
+        taken immediately before the request and after the response.
+        """
+        rtt_ms = max(0.0, (received_at - sent_at) * 1000)
+
+        with self.__lock:
+            if (
+                self.__local
+                or track_key != self.__track_key
+                or is_playing != self.__is_playing
+                or duration_ms != self.__duration_ms
+            ):
+                self.__samples.clear()
+
+            self.__local = False
+            self.__track_key = track_key
+            self.__is_playing = is_playing
+            self.__duration_ms = duration_ms
+
+            if not is_playing or ms_remote < 0:
+                self.__samples.clear()
+                self.__paused_position_ms = ms_remote
+                return
+
+            sample = ClockSample(rtt_ms, ms_remote + rtt_ms / 2 - received_at * 1000)
+
+            if self.__samples:
+                expected = self.__best_sample().offset_ms
+                if abs(sample.offset_ms - expected) > self.discontinuity_ms + rtt_ms:
+                    self.__samples.clear()
+
+            self.__samples.append(sample)
+
+    def apply_local(self, position_ms=None, is_playing=None):
+        # type: (int | None, bool | None) -> None
+        """
+        Move the estimate after a local play, pause or seek without waiting for the remote to confirm it.
+
+        The change holds until the next `record`, which replaces it with real samples.
+        """
+        with self.__lock:
+            now = self.__clock()
+            if position_ms is None:
+                position_ms = self.__position_at(now)
+            if is_playing is not None:
+                self.__is_playing = is_playing
+            if self.__duration_ms > 0:
+                position_ms = min(position_ms, self.__duration_ms)
+
+            self.__local = True
+            self.__samples.clear()
+            if self.__is_playing and position_ms >= 0:
+                self.__samples.append(ClockSample(0.0, position_ms - now * 1000))
+            else:
+                self.__paused_position_ms = position_ms
+
+    def reset(self):
+        # type: () -> None
+        with self.__lock:
+            self.__local = False
+            self.__samples.clear()
+            self.__track_key = None
+            self.__is_playing = False
+            self.__paused_position_ms = -1
+
+    def __best_sample(self):
+        # type: () -> ClockSample
+        return min(self.__samples, key=lambda s: s.rtt_ms)
+
+    def position_ms(self, now=None):
+        # type: (float | None) -> int
+        """Corrected playback position at local time `now`, or -1 if unknown"""
+        with self.__lock:
+            return self.__position_at(self.__clock() if now is None else now)
+
+    def __position_at(self, now):
+        # type: (float) -> int
+        # Must be called with the lock held
+        if not self.__is_playing or not self.__samples:
+            return self.__paused_position_ms
+
+        position = int(now * 1000 + self.__best_sample().offset_ms)
+        if self.__duration_ms > 0:
+            position = min(position, self.__duration_ms)
+        return max(0, position)
+
+    def latency_ms(self):
+        # type: () -> float
+        """Estimated one-way latency of the best recent sample"""
+        with self.__lock:
+            if not self.__samples:
+                return 0.0
+            return self.__best_sample().rtt_ms / 2
+
+    def confidence(self):
+        # type: () -> float
+        """
+        Value between 0 and 1 describing how far `position_ms` can be trusted.
+
+        It grows with the number of consistent samples and shrinks with jitter and latency.
+        """
+        with self.__lock:
+            if not self.__is_playing:
+                return 1.0 if self.__paused_position_ms >= 0 else 0.0
+            if not self.__samples:
+                return 0.0
+
+            best = self.__best_sample()
+            jitter = (
+                pstdev(s.offset_ms for s in self.__samples)
+                if len(self.__samples) > 1
+                else best.rtt_ms / 2
+            )
+            uncertainty = best.rtt_ms / 2 + jitter
+            coverage = min(1.0, len(self.__samples) / CONSTANTS.CONFIDENT_SAMPLES)
+            return coverage / (1 + uncertainty / CONSTANTS.CONFIDENCE_SCALE_MS)
@@ -0,0 +1,54 @@
+import itertools, threading, time
+from typing import Callable
+
+
+class CONSTANTS:
+    __slots__ = ()
+    # Spotify applies commands asynchronously. Polls sent this soon after a command returns may still show the old state
+    SETTLE_GRACE_S = 0.5
+
+
+class PendingCommands:
+    """
+    Playback commands (play, pause, seek) that were applied optimistically but aren't confirmed by a poll yet.
+
+    A poll that was sent while a command was in flight, or right after it returned, may describe the state
+    from before the command. `accepts` tells the poller to drop such results instead of undoing the
+    optimistic update; the first poll sent after every command has settled reconciles local state.
+    """
+
+    def __init__(self, clock=time.monotonic, settle_grace_s=CONSTANTS.SETTLE_GRACE_S):
+        # type: (Callable[[], float], float) -> None
+        self.settle_grace_s = settle_grace_s
+
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__ids = itertools.count(1)
+        self.__in_flight = set()  # type: set[int]
+        self.__settled_at = float("-inf")
+
+    def begin(self):
+        # type: () -> int
+        """Register a command about to be sent. Returns its id for `finish`"""
+        with self.__lock:
+            command_id = next(self.__ids)
+            self.__in_flight.add(command_id)
+            return command_id
+
+    def finish(self, command_id):
+        # type: (int) -> None
+        """The command returned, successfully or not"""
+        with self.__lock:
+            self.__in_flight.discard(command_id)
+            self.__settled_at = max(self.__settled_at, self.__clock())
+
+    def in_flight(self):
+        # type: () -> int
+        with self.__lock:
+            return len(self.__in_flight)
+
+    def accepts(self, sent_at):
+        # type: (float) -> bool
+        """Whether a poll sent at local time `sent_at` reflects every command issued so far"""
+        with self.__lock:
+            return not self.__in_flight and sent_at >= self.__settled_at + self.settle_grace_s
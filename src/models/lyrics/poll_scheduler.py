@@ -0,0 +1,140 @@
+import threading, time
+from typing import Callable
+from .data_types import TrackDetails
+
+
+class CONSTANTS:
+    __slots__ = ()
+    PLAYING_INTERVAL_S = 10  # Mid-track polls only correct drift, seeks and skips
+    BOUNDARY_WINDOW_S = 1.5  # Track end is considered "near" within this window
+    BOUNDARY_INTERVAL_S = 0.5
+    USER_ACTION_WINDOW_S = 3  # Poll quickly for this long after the user interacts with playback
+    USER_ACTION_INTERVAL_S = 0.5
+    PAUSED_MIN_INTERVAL_S = 2
+    PAUSED_MAX_INTERVAL_S = 30
+    HIDDEN_FACTOR = 4  # Polls are spread out this much more while the window is hidden
+
+
+class PollScheduler:
+    """
+    Decide when to poll `get_currently_playing_song` next, and extrapolate playback position in between.
+
+    While a track plays, its position advances with the local monotonic clock, so polls are only needed
+    to catch seeks, skips and the change to the next track. Polls are therefore frequent right after user
+    actions and around the expected end of the track, sparse mid-track, and back off exponentially while
+    nothing is playing. Every interval is stretched further while the window is hidden.
+    """
+
+    def __init__(
+        self,
+        playing_interval_s=CONSTANTS.PLAYING_INTERVAL_S,
+        boundary_window_s=CONSTANTS.BOUNDARY_WINDOW_S,
+        boundary_interval_s=CONSTANTS.BOUNDARY_INTERVAL_S,
+        user_action_window_s=CONSTANTS.USER_ACTION_WINDOW_S,
+        user_action_interval_s=CONSTANTS.USER_ACTION_INTERVAL_S,
+        paused_min_interval_s=CONSTANTS.PAUSED_MIN_INTERVAL_S,
+        paused_max_interval_s=CONSTANTS.PAUSED_MAX_INTERVAL_S,
+        hidden_factor=CONSTANTS.HIDDEN_FACTOR,
+        clock=time.monotonic,
+    ):
+        # type: (float, float, float, float, float, float, float, float, Callable[[], float]) -> None
+        self.playing_interval_s = playing_interval_s
+        self.boundary_window_s = boundary_window_s
+        self.boundary_interval_s = boundary_interval_s
+        self.user_action_window_s = user_action_window_s
+        self.user_action_interval_s = user_action_interval_s
+        self.paused_min_interval_s = paused_min_interval_s
+        self.paused_max_interval_s = paused_max_interval_s
+        self.hidden_factor = hidden_factor
+
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__track = None  # type: TrackDetails | None
+        self.__sampled_at = 0.0  # Local time at which `__track.ms_remote` was valid
+        self.__idle_polls = 0
+        self.__last_user_action = float("-inf")
+        self.__visible = True
+
+    @property
+    def track(self):
+        # type: () -> TrackDetails | None
+        return self.__track
+
+    def on_poll(self, track, sampled_at=None):
+        # type: (TrackDetails | None, float | None) -> None
+        """
+        Record a poll result. `sampled_at` is the local time at which `track.ms_remote` was valid,
+        e.g. the midpoint of the request's round trip (see `PlaybackClock`).
+        """
+        with self.__lock:
+            self.__track = track
+            self.__sampled_at = self.__clock() if sampled_at is None else sampled_at
+
+            if track is None or not track.is_playing:
+                self.__idle_polls += 1
+            else:
+                self.__idle_polls = 0
+
+    def notify_user_action(self):
+        # type: () -> None
+        """Playback was changed locally (play, pause, seek, skip). Poll soon to pick up the new state"""
+        with self.__lock:
+            self.__last_user_action = self.__clock()
+            self.__idle_polls = 0
+
+    def set_visible(self, visible):
+        # type: (bool) -> None
+        with self.__lock:
+            self.__visible = bool(visible)
+
+    def estimated_position_ms(self, now=None):
+        # type: (float | None) -> int
+        """Playback position extrapolated from the last poll, or -1 if unknown"""
+        with self.__lock:
+            return self.__estimated_position_ms(
+                self.__clock() if now is None else now
+            )
+
+    def __estimated_position_ms(self, now):
+        # type: (float) -> int
+        track = self.__track
+        if track is None or track.ms_remote < 0:
+            return -1
+        if not track.is_playing:
+            return track.ms_remote
+
+        position = track.ms_remote + int((now - self.__sampled_at) * 1000)
+        if track.duration_ms > 0:
+            position = min(position, track.duration_ms)
+        return position
+
+    def next_poll_delay(self, now=None):
+        # type: (float | None) -> float
+        """Seconds to wait before the next poll"""
+        with self.__lock:
+            now = self.__clock() if now is None else now
+            if now - self.__last_user_action <= self.user_action_window_s:
+                return self.user_action_interval_s
+
+            delay = self.__base_delay(now)
+            if not self.__visible:
+                delay *= self.hidden_factor
+            return delay
+
+    def __base_delay(self, now):
+        # type: (float) -> float
+        track = self.__track
+        if track is None or not track.is_playing:
+            backoff = self.paused_min_interval_s * (2 ** max(0, self.__idle_polls - 1))
+            return min(self.paused_max_interval_s, backoff)
+
+        position = self.__estimated_position_ms(now)
+        if track.duration_ms <= 0 or position < 0:
+            return self.playing_interval_s
+
+        remaining_s = (track.duration_ms - position) / 1000
+        if remaining_s <= self.boundary_window_s:
+            return self.boundary_interval_s
+
+        # Wake up when the track is expected to end, unless a regular poll is due earlier
+        return min(self.playing_interval_s, remaining_s - self.boundary_window_s / 2)
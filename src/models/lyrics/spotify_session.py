@@ -0,0 +1,360 @@
+import enum, logging, threading, time
+import requests
+import spotipy
+from typing import Callable
+from requests.adapters import HTTPAdapter
+from .data_types import TrackDetails
+
+logger = logging.getLogger(__name__)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    REFRESH_MARGIN_S = 60  # Refresh the access token this long before it expires
+    MIN_REFRESH_DELAY_S = 5
+    REQUESTS_TIMEOUT_S = 5
+    POOL_SIZE = 4
+    DEFAULT_RETRY_AFTER_S = 5  # Used when a 429 response has no usable Retry-After header
+    MIN_ERROR_BACKOFF_S = 1
+    MAX_BACKOFF_S = 120
+
+
+class PlaybackStatus(enum.Enum):
+    OK = enum.auto()  # A track, episode or ad is loaded
+    NOTHING_PLAYING = enum.auto()
+    THROTTLED = enum.auto()  # Rate limited or backing off. No request was answered
+    ERROR = enum.auto()  # Network or server error
+
+
+class PollResult:
+    __slots__ = ("status", "track", "retry_after_s", "error")
+
+    def __init__(self, status, track=None, retry_after_s=0.0, error=None):
+        # type: (PlaybackStatus, TrackDetails | None, float, Exception | None) -> None
+        self.status = status
+        self.track = track
+        self.retry_after_s = retry_after_s  # Seconds until the API may be called again
+        self.error = error  # What went wrong, for `PlaybackStatus.ERROR`
+
+    def __repr__(self):
+        return f"PollResult(status={self.status.name}, track={self.track}, retry_after_s={self.retry_after_s})"
+
+
+class SpotifyThrottled(Exception):
+    def __init__(self, retry_after_s):
+        # type: (float) -> None
+        super().__init__(f"Spotify API calls are paused for {retry_after_s:.1f}s")
+        self.retry_after_s = retry_after_s
+
+
+class SharedBackoff:
+    """
+    Back-off state shared by every caller of a session.
+
+    A 429 response pauses all calls for its `Retry-After`; server and network errors pause them
+    exponentially longer with each consecutive failure. Callers check `remaining()` before making
+    a request, so throttling is never extended by a storm of retries.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        # type: (Callable[[], float]) -> None
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__blocked_until = 0.0
+        self.__consecutive_errors = 0
+
+    def remaining(self):
+        # type: () -> float
+        with self.__lock:
+            return max(0.0, self.__blocked_until - self.__clock())
+
+    def on_success(self):
+        # type: () -> None
+        with self.__lock:
+            self.__consecutive_errors = 0
+
+    def on_rate_limited(self, retry_after_s):
+        # type: (float) -> float
+        return self.__block(min(CONSTANTS.MAX_BACKOFF_S, max(0.0, retry_after_s)))
+
+    def on_error(self):
+        # type: () -> float
+        with self.__lock:
+            self.__consecutive_errors += 1
+            delay = CONSTANTS.MIN_ERROR_BACKOFF_S * (2 ** (self.__consecutive_errors - 1))
+        return self.__block(min(CONSTANTS.MAX_BACKOFF_S, delay))
+
+    def __block(self, delay):
+        # type: (float) -> float
+        with self.__lock:
+            self.__blocked_until = max(self.__blocked_until, self.__clock() + delay)
+            return self.__blocked_until - self.__clock()
+
+
+def parse_retry_after(headers):
+    # type: (dict | None) -> float
+    value = (headers or {}).get("Retry-After", None)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return CONSTANTS.DEFAULT_RETRY_AFTER_S
+
+
+def decode_currently_playing(payload):
+    # type: (dict | None) -> TrackDetails | None
+    """
+    Build `TrackDetails` from a currently-playing response.
+
+    Only the fields we use are read; markets, external urls, available actions and the rest are ignored.
+    """
+    if payload is None:
+        return None
+
+    item = payload.get("item", None)
+    progress_ms = payload.get("progress_ms", None)
+
+    details = TrackDetails(
+        name="",
+        artists=[],
+        is_playing=payload.get("is_playing", False),
+        ms_remote=progress_ms if progress_ms else -1,
+        duration_ms=-1,
+        track_type=payload.get("currently_playing_type", "unknown"),
+    )
+
+    if item:
+        details.name = item.get("name", "")
+        details.track_id = item.get("id", None) or ""
+        details.duration_ms = item.get("duration_ms", -1)
+        details.artists = [artist["name"] for artist in item.get("artists", ())]
+
+        popularity = item.get("popularity", None)
+        if popularity is not None:
+            details.popularity = popularity / 100
+
+        # Tracks carry album art, episodes carry the show's art
+        album = item.get("album", None)
+        images = album.get("images", None) if album else item.get("images", None)
+        if images:
+            details.album_art_url = images[0]["url"]
+            details.album_images = tuple(
+                (image.get("width", None) or 0, image["url"]) for image in images
+            )
+
+    return details
+
+
+class PlaybackSession:
+    """
+    Long-lived Spotify connection used for playback polling and control.
+
+    The session owns a single OAuth manager and a single `spotipy.Spotify` client sharing one pooled
+    keep-alive HTTP session, so a poll is a single request over a warm connection. The access token is
+    refreshed on a background timer shortly before it expires, keeping refreshes off the polling path.
+
+    Every API call goes through `call`, which shares one `SharedBackoff` between all callers.
+    """
+
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        redirect_uri,
+        scope,
+        cached_token_info=None,
+        cache_handler=None,
+        refresh_margin_s=CONSTANTS.REFRESH_MARGIN_S,
+        requests_timeout=CONSTANTS.REQUESTS_TIMEOUT_S,
+        api_prefix=None,
+        token_url=None,
+    ):
+        # type: (str, str, str, list[str], dict | None, spotipy.cache_handler.CacheHandler | None, float, float, str | None, str | None) -> None
+        """
+        `api_prefix` and `token_url` replace the Web API and token endpoints,
+        e.g. to point the session at `tools/mock_spotify_server.py`
+        """
+        self.refresh_margin_s = refresh_margin_s
+
+        self.__http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=CONSTANTS.POOL_SIZE, pool_maxsize=CONSTANTS.POOL_SIZE
+        )
+        self.__http.mount("https://", adapter)
+        self.__http.mount("http://", adapter)
+
+        if cache_handler is None:
+            cache_handler = spotipy.cache_handler.MemoryCacheHandler(cached_token_info)
+        self.__cache_handler = cache_handler
+
+        self.__oauth = spotipy.oauth2.SpotifyOAuth(
+            client_id=client_id,
+            client_secret=client_secret,
+            redirect_uri=redirect_uri,
+            scope=scope,
+            cache_handler=cache_handler,
+            requests_session=self.__http,
+            requests_timeout=requests_timeout,
+        )
+        self.__client = spotipy.Spotify(
+            auth_manager=self.__oauth,
+            requests_session=self.__http,
+            requests_timeout=requests_timeout,
+        )
+
+        if api_prefix:
+            self.__client.prefix = api_prefix
+        if token_url:
+            self.__oauth.OAUTH_TOKEN_URL = token_url
+
+        self.backoff = SharedBackoff()
+
+        self.__lock = threading.Lock()
+        self.__refresh_timer = None  # type: threading.Timer | None
+        self.__closed = False
+
+    @property
+    def client(self):
+        # type: () -> spotipy.Spotify
+        return self.__client
+
+    @property
+    def oauth(self):
+        # type: () -> spotipy.oauth2.SpotifyOAuth
+        return self.__oauth
+
+    def token_info(self):
+        # type: () -> dict
+        """
+        Return valid token info, refreshing it if needed.
+
+        If no token is cached, this will take the user to the Spotify authentication page on their web browser.
+        """
+        token_info = self.__oauth.validate_token(self.__cache_handler.get_cached_token())
+
+        if token_info is None:  # No token exists
+            token_info = self.__oauth.get_access_token(None, as_dict=True)
+
+            # Note: This is only for future versions of spotipy which may not support as_dict in get_access_token
+            if isinstance(token_info, (str,)):
+                token_info = self.__cache_handler.get_cached_token()
+
+        self.__schedule_refresh(token_info)
+        return token_info
+
+    def start(self):
+        # type: () -> PlaybackSession
+        """Acquire a token up front so the first poll doesn't pay for it"""
+        self.token_info()
+        return self
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Call `fn` (usually a method of `client`), honouring and updating the shared back-off.
+
+        Raises `SpotifyThrottled` without making a request while backing off, or when the request is rate limited.
+        """
+        remaining = self.backoff.remaining()
+        if remaining > 0:
+            raise SpotifyThrottled(remaining)
+
+        try:
+            result = fn(*args, **kwargs)
+        except spotipy.SpotifyException as e:
+            if e.http_status == 429:
+                retry_after = self.backoff.on_rate_limited(parse_retry_after(e.headers))
+                raise SpotifyThrottled(retry_after) from e
+            if (e.http_status or 0) >= 500:
+                self.backoff.on_error()
+            raise
+        except requests.RequestException:
+            self.backoff.on_error()
+            raise
+
+        self.backoff.on_success()
+        return result
+
+    def currently_playing(self):
+        # type: () -> dict | None
+        return self.call(self.__client.currently_playing)
+
+    def play(self):
+        # type: () -> None
+        self.call(self.__client.start_playback)
+
+    def pause(self):
+        # type: () -> None
+        self.call(self.__client.pause_playback)
+
+    def seek(self, position_ms):
+        # type: (int) -> None
+        self.call(self.__client.seek_track, max(0, int(position_ms)))
+
+    def poll(self):
+        # type: () -> PollResult
+        """Fetch the currently playing track, telling rate limiting and errors apart from silence"""
+        try:
+            payload = self.currently_playing()
+        except SpotifyThrottled as e:
+            return PollResult(PlaybackStatus.THROTTLED, retry_after_s=e.retry_after_s)
+        except Exception as e:
+            logger.warning("Polling the currently playing track failed", exc_info=True)
+            return PollResult(
+                PlaybackStatus.ERROR, retry_after_s=self.backoff.remaining(), error=e
+            )
+
+        track = decode_currently_playing(payload)
+        if track is None:
+            return PollResult(PlaybackStatus.NOTHING_PLAYING)
+        return PollResult(PlaybackStatus.OK, track)
+
+    def __schedule_refresh(self, token_info):
+        # type: (dict | None) -> None
+        if not token_info or "expires_at" not in token_info:
+            return
+
+        delay = token_info["expires_at"] - time.time() - self.refresh_margin_s
+        delay = max(CONSTANTS.MIN_REFRESH_DELAY_S, delay)
+
+        with self.__lock:
+            if self.__closed:
+                return
+            if self.__refresh_timer is not None:
+                self.__refresh_timer.cancel()
+            self.__refresh_timer = threading.Timer(delay, self.__refresh_token)
+            self.__refresh_timer.daemon = True
+            self.__refresh_timer.start()
+
+    def __refresh_token(self):
+        # type: () -> None
+        token_info = self.__cache_handler.get_cached_token()
+        if not token_info or "refresh_token" not in token_info:
+            return
+
+        try:
+            token_info = self.__oauth.refresh_access_token(token_info["refresh_token"])
+        except Exception:
+            # The next poll refreshes the token on demand
+            logger.warning("Refreshing the access token failed", exc_info=True)
+            return
+
+        self.__schedule_refresh(token_info)
+
+    @property
+    def closed(self):
+        # type: () -> bool
+        return self.__closed
+
+    def close(self):
+        # type: () -> None
+        with self.__lock:
+            self.__closed = True
+            if self.__refresh_timer is not None:
+                self.__refresh_timer.cancel()
+                self.__refresh_timer = None
+        self.__http.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,63 @@
+import os, logging, stat
+import spotipy
+from .utils import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    DEFAULT_TOKEN_CACHE_PATH = os.path.join(
+        os.path.expanduser("~"), ".showlyrics", "spotify_token.json"
+    )
+    FILE_MODE = stat.S_IRUSR | stat.S_IWUSR  # 0o600
+    DIR_MODE = stat.S_IRWXU  # 0o700
+
+
+class SpotifyFileCacheHandler(spotipy.cache_handler.CacheHandler):
+    """
+    Persist Spotify token info (including the refresh token) to a file only the current user can read.
+
+    Writes replace the file atomically, so a crash mid-write never leaves a truncated token behind.
+    With a cached refresh token, a cold start needs one refresh request instead of an interactive login.
+
+    spotipy asks for the token on every request, so the file is only read until a token is known;
+    after that the token is served from memory.
+    """
+
+    def __init__(self, cache_path=None):
+        # type: (str | None) -> None
+        self.cache_path = cache_path or CONSTANTS.DEFAULT_TOKEN_CACHE_PATH
+        self.__token_info = None  # type: dict | None
+
+    def get_cached_token(self):
+        # type: () -> dict | None
+        if self.__token_info is None:
+            token_info = read_json(self.cache_path, None)
+            if isinstance(token_info, dict) and "access_token" in token_info:
+                self.__token_info = token_info
+
+        # A copy, so callers can't change the cached token
+        return dict(self.__token_info) if self.__token_info is not None else None
+
+    def save_token_to_cache(self, token_info):
+        # type: (dict) -> None
+        self.__token_info = dict(token_info)
+
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=CONSTANTS.DIR_MODE, exist_ok=True)
+
+        try:
+            atomic_write_json(self.cache_path, token_info, CONSTANTS.FILE_MODE)
+        except OSError:
+            # The token stays valid for this run
+            logger.warning("Saving the token to %s failed", self.cache_path, exc_info=True)
+
+    def clear(self):
+        # type: () -> None
+        self.__token_info = None
+        try:
+            os.remove(self.cache_path)
+        except FileNotFoundError:
+            pass
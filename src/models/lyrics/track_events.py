@@ -0,0 +1,124 @@
+import enum, threading, time
+from typing import Callable, Iterable
+from .data_types import TrackDetails
+
+
+class CONSTANTS:
+    __slots__ = ()
+    SEEK_TOLERANCE_MS = 1500  # Position jumps larger than this (beyond elapsed time) are seeks
+
+
+class PlaybackEventType(enum.Enum):
+    TRACK_CHANGED = enum.auto()  # A different track (or nothing) is now playing
+    PLAY_STATE_CHANGED = enum.auto()  # Playback was paused or resumed
+    SEEKED = enum.auto()  # Position jumped further than elapsed time explains
+    PROGRESS = enum.auto()  # Position advanced as expected
+
+
+class PlaybackEvent:
+    __slots__ = ("type", "track", "previous", "position_ms")
+
+    def __init__(self, type, track, previous, position_ms):
+        # type: (PlaybackEventType, TrackDetails | None, TrackDetails | None, int) -> None
+        self.type = type
+        self.track = track
+        self.previous = previous
+        self.position_ms = position_ms
+
+    def __repr__(self):
+        name = self.track.name if self.track is not None else None
+        return f"PlaybackEvent(type={self.type.name}, track={name}, position_ms={self.position_ms})"
+
+
+class TrackEventStream:
+    """
+    Turn a sequence of poll results into typed playback events, emitted only on real changes.
+
+    Tracks are compared by `TrackDetails.identity`, so repeated polls of the same track only produce
+    play state, seek or progress events, and identical polls produce none at all.
+    """
+
+    def __init__(self, seek_tolerance_ms=CONSTANTS.SEEK_TOLERANCE_MS, clock=time.monotonic):
+        # type: (int, Callable[[], float]) -> None
+        self.seek_tolerance_ms = seek_tolerance_ms
+
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__track = None  # type: TrackDetails | None
+        self.__sampled_at = 0.0
+        self.__subscribers = []  # type: list[tuple[Callable[[PlaybackEvent], None], frozenset[PlaybackEventType] | None]]
+
+    @property
+    def track(self):
+        # type: () -> TrackDetails | None
+        return self.__track
+
+    def subscribe(self, callback, types=None):
+        # type: (Callable[[PlaybackEvent], None], Iterable[PlaybackEventType] | None) -> Callable[[], None]
+        """Call `callback` for every event (or only events of `types`). Returns a function that unsubscribes"""
+        subscriber = (callback, frozenset(types) if types is not None else None)
+        with self.__lock:
+            self.__subscribers.append(subscriber)
+
+        def unsubscribe():
+            with self.__lock:
+                if subscriber in self.__subscribers:
+                    self.__subscribers.remove(subscriber)
+
+        return unsubscribe
+
+    def update(self, track, sampled_at=None):
+        # type: (TrackDetails | None, float | None) -> list[PlaybackEvent]
+        """Process a poll result, notify subscribers and return the emitted events"""
+        sampled_at = self.__clock() if sampled_at is None else sampled_at
+
+        with self.__lock:
+            previous, previous_sampled_at = self.__track, self.__sampled_at
+            self.__track, self.__sampled_at = track, sampled_at
+            subscribers = list(self.__subscribers)
+
+        events = self.__diff(previous, previous_sampled_at, track, sampled_at)
+
+        for event in events:
+            for callback, types in subscribers:
+                if types is None or event.type in types:
+                    callback(event)
+
+        return events
+
+    def __diff(self, previous, previous_sampled_at, track, sampled_at):
+        # type: (TrackDetails | None, float, TrackDetails | None, float) -> list[PlaybackEvent]
+        if previous is None and track is None:
+            return []
+
+        position = track.ms_remote if track is not None else -1
+
+        if previous is None or track is None or previous != track:
+            return [
+                PlaybackEvent(PlaybackEventType.TRACK_CHANGED, track, previous, position)
+            ]
+
+        if previous.is_playing != track.is_playing:
+            # How long playback ran between the two polls is unknown, so seeks can't be told apart here
+            return [
+                PlaybackEvent(
+                    PlaybackEventType.PLAY_STATE_CHANGED, track, previous, position
+                )
+            ]
+
+        events = []
+        if previous.ms_remote >= 0 and track.ms_remote >= 0:
+            expected = previous.ms_remote
+            if previous.is_playing:
+                expected += int((sampled_at - previous_sampled_at) * 1000)
+
+            if abs(track.ms_remote - expected) > self.seek_tolerance_ms:
+                events.append(
+                    PlaybackEvent(PlaybackEventType.SEEKED, track, previous, position)
+                )
+            elif track.ms_remote != previous.ms_remote:
+                events.append(
+                    PlaybackEvent(PlaybackEventType.PROGRESS, track, previous, position)
+                )
+
+        return events
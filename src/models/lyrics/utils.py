@@ -0,0 +1,47 @@
+import os, json, tempfile
+
+
+def atomic_write_bytes(path, data, mode=None):
+    # type: (str, bytes, int | None) -> None
+    """
+    Write `data` to `path` so that readers only ever see the old or the new contents.
+
+    The data is written to a temporary file in the same directory, flushed to disk and renamed over `path`.
+    If `mode` is given, the file is created with those permission bits before any data is written.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path, text, mode=None):
+    # type: (str, str, int | None) -> None
+    atomic_write_bytes(path, text.encode("utf-8"), mode)
+
+
+def atomic_write_json(path, data, mode=None):
+    # type: (str, object, int | None) -> None
+    atomic_write_text(path, json.dumps(data), mode)
+
+
+def read_json(path, default=None):
+    # type: (str, object) -> object
+    # Returns `default` if the file is missing or isn't valid JSON
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return default
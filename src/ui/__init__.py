@@ -1,4 +1,6 @@
 from .qt_imports import QApplication, ApplicationAttributes
 from .settings_view import SettingsView
 from .app_view import MainWindowView
+from .playback_worker import PlaybackWorker
+from .playback_controls import PlaybackController
 from ..models import *
\ No newline at end of file
@@ -1,3 +1,5 @@
+import logging
+
 from .generic_view_components import *
 from .icon_components import (
     AppIcon,
@@ -8,23 +10,190 @@ from .icon_components import (
     ExpandShrinkIcon,
     RewindIcon,
 )
+from .playback_worker import PlaybackWorker
+from .playback_controls import PlaybackController
+from .auto_theme import AutoTheme
+from ..models.lyrics.lyrics_view_model import LRCLyrics, get_lyrics
+from ..models.lyrics.album_art import (
+    AlbumArtService,
+    get_album_art_service,
+    select_image,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    LYRIC_TICK_MS = 100  # How often the current lyric line is re-evaluated
 
 
 class MainWindowView(GenericWindowView):
-    def __init__(self, parent):
-        # type: (QWidget | None) -> None
+    settingsRequested = Signal()
+
+    _lyricsLoaded = Signal(object, object)  # Track identity, LRCLyrics or None
+
+    def __init__(self, parent, playbackWorker=None):
+        # type: (QWidget | None, PlaybackWorker | None) -> None
+        footer = FooterView(None)
+        lyricsView = LyricsView(None)
         super().__init__(
             parent,
             "Main Text",
             "Sub Text",
-            LyricsView(None),
-            footer=FooterView(None),
+            lyricsView,
+            footer=footer,
         )
         self.layout().setSpacing(0)
         self.resize(400, 180)
 
+        self.__footer = footer
+        self.__lyricsView = lyricsView
+        footer.settingsRequested.connect(self.settingsRequested)
+        self.__lyricsTimer = QTimer(self)
+        self.__lyricsTimer.setInterval(CONSTANTS.LYRIC_TICK_MS)
+        self.__lyricsTimer.timeout.connect(self.__onLyricsTick)
+        self._lyricsLoaded.connect(self.__onLyricsLoaded, Qt.ConnectionType.QueuedConnection)
+
+        self.__track = None  # type: TrackDetails | None
+        self.__autoTheme = None  # type: AutoTheme | None
+        self.__themeUrl = ""
+        self.__manualBorderColor = None  # type: QColor | None
+        self.__playbackWorker = playbackWorker
+        self.__playbackController = None  # type: PlaybackController | None
+        if playbackWorker is not None:
+            playbackWorker.trackChanged.connect(self.__onTrackChanged)
+            self.__playbackController = PlaybackController(playbackWorker, self)
+            footer.mediaControl().setController(self.__playbackController)
+
+    def playbackWorker(self):
+        # type: () -> PlaybackWorker | None
+        return self.__playbackWorker
+
+    def playbackController(self):
+        # type: () -> PlaybackController | None
+        return self.__playbackController
+
+    def setAutoTheme(self, enabled):
+        # type: (bool) -> None
+        """Take the window and text colours from the current album art instead of the chosen colours"""
+        if enabled == (self.__autoTheme is not None):
+            return
+
+        if enabled:
+            self.__manualBorderColor = self._borderStyle.color
+            self.__autoTheme = AutoTheme(self)
+            self.__autoTheme.paletteReady.connect(self.__onPaletteReady)
+            self.__requestTheme()
+        else:
+            self.__autoTheme.deleteLater()
+            self.__autoTheme = None
+            self.__themeUrl = ""
+            self.__applyColors(self.__manualBorderColor, QColor(255, 255, 255), None)
+
+    def isAutoTheme(self):
+        # type: () -> bool
+        return self.__autoTheme is not None
+
+    def __requestTheme(self):
+        if self.__autoTheme is None:
+            return
+        images = self.__track.album_images if self.__track is not None else ()
+        self.__themeUrl = self.__autoTheme.request(images)
+
+    def __onPaletteReady(self, url, palette):
+        # type: (str, ArtPalette) -> None
+        if url != self.__themeUrl:
+            return
+        self.__applyColors(
+            QColor(*palette.background),
+            QColor(*palette.foreground),
+            QColor(*palette.accent),
+        )
+
+    def __applyColors(self, background, text, accent):
+        # type: (QColor | None, QColor, QColor | None) -> None
+        # Without an accent the lyrics go back to their default colours
+        self._borderStyle.color = background
+        self._titleBarView.mainTextLabel.setTextColor(text)
+        self._titleBarView.subTextLabel.setTextColor(text)
+        if accent is not None:
+            self.__lyricsView.setLyricColors(text, accent)
+        else:
+            self.__lyricsView.setLyricColors(None, None)
+        self.update()
+
+    def __loadLyrics(self, track):
+        # type: (TrackDetails | None) -> None
+        self.__lyricsTimer.stop()
+        self.__lyricsView.setLyrics(None)
+        if track is None or not track.name:
+            return
+
+        identity = track.identity
+        artist = track.artists[0] if track.artists else ""
+        loaded = self._lyricsLoaded
+
+        def load():
+            try:
+                lyrics = get_lyrics(track.name, artist)
+            except Exception:
+                logger.warning("Loading lyrics of %r failed", track.name, exc_info=True)
+                lyrics = None
+            loaded.emit(identity, lyrics)
+
+        QThreadPool.globalInstance().start(load)
+
+    def __onLyricsLoaded(self, identity, lyrics):
+        # type: (tuple, LRCLyrics | None) -> None
+        if self.__track is None or self.__track.identity != identity:
+            return  # The track changed while the lyrics loaded
+        self.__lyricsView.setLyrics(lyrics)
+        if lyrics:
+            self.__onLyricsTick()
+            self.__lyricsTimer.start()
+
+    def __onLyricsTick(self):
+        # Only repaints when the current line changes
+        if self.__playbackWorker is not None:
+            self.__lyricsView.setPosition(self.__playbackWorker.clock.position_ms())
+
+    def __onTrackChanged(self, track):
+        # type: (TrackDetails | None) -> None
+        self.__track = track
+        self.__requestTheme()
+        self.__loadLyrics(track)
+        if track is None:
+            self._titleBarView.mainTextLabel.setText("")
+            self._titleBarView.subTextLabel.setText("")
+            self.__footer.setAlbumArt(())
+        else:
+            self._titleBarView.mainTextLabel.setText(track.name)
+            self._titleBarView.subTextLabel.setText(", ".join(track.artists))
+            self.__footer.setAlbumArt(track.album_images)
+
+    def showEvent(self, event):
+        # type: (QtGui.QShowEvent) -> None
+        if self.__playbackWorker is not None:
+            self.__playbackWorker.setVisible(True)
+        return super().showEvent(event)
+
+    def hideEvent(self, event):
+        # type: (QtGui.QHideEvent) -> None
+        if self.__playbackWorker is not None:
+            self.__playbackWorker.setVisible(False)
+        return super().hideEvent(event)
+
 
 class LyricsView(QFrame):
+    """
+    Paints a page of lyric lines with the current one highlighted.
+
+    Lines keep their place on a page, so moving to the next line only repaints the two lines involved.
+    A full repaint happens only when the page turns or the lyrics change.
+    """
+
     def __init__(self, parent, f=None) -> None:
         # type: (QWidget | None, WindowTypes) -> None
         if f is not None:
@@ -38,6 +207,95 @@ class LyricsView(QFrame):
         # self.setFixedSize(50, 50)
         self.setStyleSheet("background-color: green")
 
+        self.__lyrics = None  # type: LRCLyrics | None
+        self.__currentIndex = -1
+        self.__textColor = None  # type: QColor | None  # Other lines, dimmed. Defaults to the palette's text colour
+        self.__currentColor = None  # type: QColor | None  # Current line. Defaults to the text colour
+
+    def setLyricColors(self, text=None, current=None):
+        # type: (QColor | None, QColor | None) -> None
+        """Colours of the lyric lines and of the current line; None restores the default"""
+        self.__textColor = QColor(text) if text is not None else None
+        self.__currentColor = QColor(current) if current is not None else None
+        self.update()
+
+    def setLyrics(self, lyrics):
+        # type: (LRCLyrics | None) -> None
+        self.__lyrics = lyrics
+        self.__currentIndex = -1
+        self.update()
+
+    def lyrics(self):
+        # type: () -> LRCLyrics | None
+        return self.__lyrics
+
+    def setPosition(self, ms):
+        # type: (int) -> None
+        if self.__lyrics is not None and ms >= 0:
+            self.setCurrentIndex(self.__lyrics.index_at(ms))
+
+    def setCurrentIndex(self, index):
+        # type: (int) -> None
+        previous = self.__currentIndex
+        if index == previous:
+            return
+        self.__currentIndex = index
+
+        if self.__pageOf(previous) != self.__pageOf(index):
+            self.update()
+        else:
+            self.update(self.__lineRect(previous))
+            self.update(self.__lineRect(index))
+
+    def __lineHeight(self):
+        # type: () -> int
+        return max(1, self.fontMetrics().lineSpacing())
+
+    def __linesPerPage(self):
+        # type: () -> int
+        return max(1, self.contentsRect().height() // self.__lineHeight())
+
+    def __pageOf(self, index):
+        # type: (int) -> int
+        return max(0, index) // self.__linesPerPage()
+
+    def __lineRect(self, index):
+        # type: (int) -> QRect
+        contents = self.contentsRect()
+        row = max(0, index) % self.__linesPerPage()
+        lineHeight = self.__lineHeight()
+        return QRect(
+            contents.x(), contents.y() + row * lineHeight, contents.width(), lineHeight
+        )
+
+    def paintEvent(self, event):
+        # type: (QPaintEvent) -> None
+        super().paintEvent(event)
+        if not self.__lyrics:
+            return
+
+        entries = self.__lyrics.entries
+        perPage = self.__linesPerPage()
+        first = self.__pageOf(self.__currentIndex) * perPage
+        # The region, not its bounding rect, so the lines between two distant dirty lines aren't drawn
+        dirty = event.region()
+
+        textColor = self.__textColor
+        if textColor is None:
+            textColor = self.palette().color(QPalette.ColorRole.WindowText)
+        currentColor = self.__currentColor if self.__currentColor is not None else textColor
+        dimmed = QColor(textColor)
+        dimmed.setAlphaF(0.5)
+
+        painter = QPainter(self)
+        for index in range(first, min(first + perPage, len(entries))):
+            rect = self.__lineRect(index)
+            if not dirty.intersects(rect):
+                continue
+            painter.setPen(currentColor if index == self.__currentIndex else dimmed)
+            painter.drawText(rect, AlignmentFlag.AlignCenter, entries[index].lyric)
+        painter.end()
+
 
 class MediaControl(QFrame):
     def __init__(self, parent, f=None):
@@ -46,38 +304,74 @@ class MediaControl(QFrame):
         else:
             super().__init__(parent)
 
+        self.__controller = None  # type: PlaybackController | None
+
         layout = QHBoxLayout(self)
 
-        playPause = PlayPauseIcon(
-            self, lambda x: print("play", x), lambda y: print("pause", y)
+        self.__playPause = PlayPauseIcon(
+            self, lambda ev: self.__onPlay(), lambda ev: self.__onPause()
         )
-        playPause.setFixedSizeAppIcons(20, 20)
+        self.__playPause.setFixedSizeAppIcons(20, 20)
 
-        rewindBackward = RewindIcon(self, lambda x: print("rewind back", x), False)
+        rewindBackward = RewindIcon(self, lambda ev: self.__onRewind(False), False)
         rewindBackward.setFixedSize(20, 20)
-        rewindForward = RewindIcon(self, lambda x: print("rewind forward", x), True)
+        rewindForward = RewindIcon(self, lambda ev: self.__onRewind(True), True)
         rewindForward.setFixedSize(20, 20)
 
         layout.addWidget(rewindBackward)
-        layout.addWidget(playPause)
+        layout.addWidget(self.__playPause)
         layout.addWidget(rewindForward)
 
         layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(layout)
 
+    def setController(self, controller):
+        # type: (PlaybackController) -> None
+        self.__controller = controller
+        controller.playStateChanged.connect(self.__onPlayStateChanged)
+        self.__onPlayStateChanged(controller.isPlaying())
+
+    def __onPlayStateChanged(self, isPlaying):
+        # type: (bool) -> None
+        # State A shows the play icon, i.e. playback is paused
+        self.__playPause.setStateA(not isPlaying)
+
+    def __onPlay(self):
+        if self.__controller is not None:
+            self.__controller.play()
+
+    def __onPause(self):
+        if self.__controller is not None:
+            self.__controller.pause()
+
+    def __onRewind(self, forward):
+        # type: (bool) -> None
+        if self.__controller is not None:
+            self.__controller.rewind(forward)
+
 
 class FooterView(QFrame):
-    def __init__(self, parent, f=None):
-        # type: (QWidget | None, WindowTypes | None) -> None
+    settingsRequested = Signal()
+
+    _albumArtLoaded = Signal(str, object)  # Image url, encoded image or None
+
+    def __init__(self, parent, f=None, albumArtService=None):
+        # type: (QWidget | None, WindowTypes | None, AlbumArtService | None) -> None
         if f is not None:
             super().__init__(parent, f)
         else:
             super().__init__(parent)
 
+        self.__albumArtService = albumArtService
+        self.__albumArtUrl = ""
+        self._albumArtLoaded.connect(
+            self.__onAlbumArtLoaded, Qt.ConnectionType.QueuedConnection
+        )
+
         # self.setAutoFillBackground(True)
-        mediaControl = MediaControl(self)
-        image = CustomImage(self, "https://www.python.org/static/img/python-logo.png")
-        settings = SettingsIcon(self, lambda x: print("settings"))
+        self.__mediaControl = mediaControl = MediaControl(self)
+        self.__albumArt = image = CustomImage(self, None)
+        settings = SettingsIcon(self, lambda x: self.settingsRequested.emit())
 
         settings.setFixedSize(20, 20)
 
@@ -92,3 +386,35 @@ class FooterView(QFrame):
         self.setLayout(layout)
 
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+
+    def mediaControl(self):
+        # type: () -> MediaControl
+        return self.__mediaControl
+
+    def setAlbumArt(self, images):
+        # type: (tuple[tuple[int, str], ...]) -> None
+        """Show the image from (width, url) pairs that best fits the album art widget"""
+        if not images:
+            self.__albumArtUrl = ""
+            self.__albumArt.clear()
+            return
+
+        if self.__albumArtService is None:
+            self.__albumArtService = get_album_art_service()
+
+        targetPx = self.__albumArt.targetPixelSize()
+        self.__albumArtUrl = select_image(images, targetPx)
+        if self.__albumArt.showCachedImage(self.__albumArtUrl):
+            return  # A recent track: no download, no decode
+
+        self.__albumArtService.fetch_async(images, targetPx, self._albumArtLoaded.emit)
+
+    def __onAlbumArtLoaded(self, url, data):
+        # type: (str, bytes | None) -> None
+        # Drop art of tracks that were skipped while it downloaded
+        if url != self.__albumArtUrl:
+            return
+        if data is None:
+            self.__albumArt.clear()
+        else:
+            self.__albumArt.load_image_from_data(data, url)
@@ -0,0 +1,87 @@
+import numpy as np
+
+from .qt_imports import QImage, QObject, QSize, Signal, Qt
+from .image_decoder import decodeImage
+from ..models.lyrics.album_art import AlbumArtService, get_album_art_service, select_image
+from ..models.lyrics.art_palette import (
+    ArtPalette,
+    PaletteCache,
+    extract_palette,
+    CONSTANTS as PALETTE_CONSTANTS,
+)
+
+
+def imagePixels(image):
+    # type: (QImage) -> np.ndarray
+    """(height, width, 4) RGBA view of `image`'s pixels. Safe to call from any thread"""
+    image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+    width, height, stride = image.width(), image.height(), image.bytesPerLine()
+    buffer = np.frombuffer(image.constBits(), dtype=np.uint8, count=stride * height)
+    # Copy, since the buffer belongs to the converted image
+    return buffer.reshape(height, stride)[:, : width * 4].reshape(height, width, 4).copy()
+
+
+class AutoTheme(QObject):
+    """
+    Derive window colours from album art.
+
+    The smallest available artwork is fetched (usually from the album art cache), decoded at a few dozen
+    pixels and analysed on the album art pool; nothing but the final palette reaches the GUI thread.
+    Palettes are cached by artwork url, so each album is analysed once.
+
+    paletteReady: Emitted with the artwork url and its `ArtPalette`
+    """
+
+    paletteReady = Signal(str, object)
+
+    _analysed = Signal(str, object)
+
+    def __init__(self, parent=None, albumArtService=None, cache=None):
+        # type: (QObject | None, AlbumArtService | None, PaletteCache | None) -> None
+        super().__init__(parent)
+        self.__albumArtService = albumArtService
+        self.__cache = cache if cache is not None else PaletteCache()
+        self._analysed.connect(self.paletteReady, Qt.ConnectionType.QueuedConnection)
+
+    def request(self, images):
+        # type: (tuple[tuple[int, str], ...]) -> str
+        """
+        Compute the palette for the artwork in (width, url) pairs. Returns the url of the artwork used,
+        or "" if there is none.
+
+        `paletteReady` always follows from the event loop, even if the palette is cached, so the caller
+        can store the returned url before the palette arrives.
+        """
+        url = select_image(images, PALETTE_CONSTANTS.SAMPLE_SIZE)
+        if not url:
+            return ""
+
+        palette = self.__cache.get(url)
+        if palette is not None:
+            self._analysed.emit(url, palette)  # Queued
+            return url
+
+        if self.__albumArtService is None:
+            self.__albumArtService = get_album_art_service()
+
+        cache = self.__cache
+        analysed = self._analysed
+        sampleSize = QSize(PALETTE_CONSTANTS.SAMPLE_SIZE, PALETTE_CONSTANTS.SAMPLE_SIZE)
+
+        def analyse(url, data):
+            # type: (str, bytes | None) -> None
+            # Runs on an album art pool thread
+            if data is None:
+                return
+            image = decodeImage(data, sampleSize)
+            if image.isNull():
+                return
+
+            palette = extract_palette(imagePixels(image))
+            cache.put(url, palette)
+            analysed.emit(url, palette)
+
+        self.__albumArtService.fetch_async(
+            images, PALETTE_CONSTANTS.SAMPLE_SIZE, analyse
+        )
+        return url
@@ -1,12 +1,14 @@
 from typing import Callable
-import enum
+import enum, math
 
 from .qt_imports import *
 from .icon_components import CloseIcon
 from .resources import icons_rc
 from .fonts_import import CUSTOM_FONT_ID
 from .utils import fadeAnimation, resetFixedSize
-from functools import cache
+from .network import sharedNetworkManager, cachedGet
+from .image_decoder import sharedImageDecoder
+from .pixmap_cache import sharedPixmapCache, pixmapKey
 
 
 class CustomQWidget(QWidget):
@@ -18,7 +20,7 @@ class CustomQWidget(QWidget):
             super().__init__(parent, windowType)
 
         # self.setAttribute(WidgetAttributes.WA_Hover, True)
-        self.setAttribute(WidgetAttributes.WA_MouseTracking, True)
+        # Mouse tracking is left to the widgets that hit-test hover (see ResizableWidget)
         effect = QGraphicsOpacityEffect(self)
         effect.setOpacity(1)
         self.setGraphicsEffect(effect)
@@ -135,39 +137,68 @@ class FramelessRoundedBorderWidget(
         self.setAttribute(WidgetAttributes.WA_TranslucentBackground, True)
 
         self._borderStyle = self.BorderStyle()
+        self.__background = None  # type: QPixmap | None
+        self.__backgroundKey = None  # type: tuple | None
+
+    def _custom_repaint(self, region=None):
+        # type: (QRegion | None) -> None
+        # Only the dirty region is blitted, so a single changed lyric line doesn't redraw the whole window
+        background = self.__backgroundPixmap()
 
-    def _custom_repaint(self):
-        # type: () -> None
         painter = QPainter()
+        if painter.begin(self):
+            if region is not None:
+                painter.setClipRegion(region)
+            painter.drawPixmap(0, 0, background)
+            painter.end()
 
-        brush = QBrush(BrushStyle.SolidPattern)
+    def __backgroundPixmap(self):
+        # type: () -> QPixmap
+        # The window repaints for every lyric change and animation frame. The antialiased rounded rect is
+        # only rasterised again when the size, style or device pixel ratio changes; otherwise paint is a blit
         bg_color = (
             self.__default_bg_color()
             if self._borderStyle.color is None
             else self._borderStyle.color
         )
-        brush.setColor(bg_color)
+        dpr = self.devicePixelRatioF()
+        key = (
+            self.width(),
+            self.height(),
+            self._borderStyle.radius,
+            self._borderStyle.thickness,
+            QColor(bg_color).rgba(),
+            dpr,
+        )
+        if key == self.__backgroundKey:
+            return self.__background
+
+        pixmap = QPixmap(
+            math.ceil(max(self.width(), 1) * dpr), math.ceil(max(self.height(), 1) * dpr)
+        )
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(GlobalColor.transparent)
 
+        brush = QBrush(BrushStyle.SolidPattern)
+        brush.setColor(bg_color)
         pen = QPen(GlobalColor.transparent, self._borderStyle.thickness)
 
-        if painter.begin(self):
+        painter = QPainter()
+        if painter.begin(pixmap):
             painter.setBackgroundMode(BGMode.OpaqueMode)
             painter.setPen(pen)
             painter.setBrush(brush)
             painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
 
-            frameGeometry = self.frameGeometry().topLeft()
-            rect = QRect(
-                frameGeometry.x(),
-                frameGeometry.y(),
-                max(self.width() - 1, 0),
-                max(self.height() - 1, 0),
-            )
+            rect = QRect(0, 0, max(self.width() - 1, 0), max(self.height() - 1, 0))
             painter.drawRoundedRect(
                 rect, self._borderStyle.radius, self._borderStyle.radius
             )
             painter.end()
 
+        self.__backgroundKey, self.__background = key, pixmap
+        return pixmap
+
     def __default_bg_color(self):
         # type: () -> QColor
         return self.palette().color(self.backgroundRole())
@@ -192,7 +223,7 @@ class FramelessRoundedBorderWidget(
         # type: (QEvent | QMouseEvent) -> bool
 
         if event.type() == QEvent.Type.Paint:
-            self._custom_repaint()
+            self._custom_repaint(event.region())
             return True
 
         return super().event(event)
@@ -222,6 +253,19 @@ class ResizableWidget(FramelessRoundedBorderWidget):
         __ResizableWidgetBorder.TOPLEFT: CursorShape.SizeFDiagCursor,
     }
 
+    # Border for each (horizontal, vertical) zone: -1 = left/top band, 0 = inside, 1 = right/bottom band
+    __ZONES_TO_BORDER = {
+        (-1, -1): __ResizableWidgetBorder.TOPLEFT,
+        (0, -1): __ResizableWidgetBorder.TOP,
+        (1, -1): __ResizableWidgetBorder.TOPRIGHT,
+        (-1, 0): __ResizableWidgetBorder.LEFT,
+        (0, 0): __ResizableWidgetBorder.UNSET,
+        (1, 0): __ResizableWidgetBorder.RIGHT,
+        (-1, 1): __ResizableWidgetBorder.BOTTOMLEFT,
+        (0, 1): __ResizableWidgetBorder.BOTTOM,
+        (1, 1): __ResizableWidgetBorder.BOTTOMRIGHT,
+    }
+
     __BORDER_TO_NATIVE_EDGE = {
         __ResizableWidgetBorder.BOTTOM: Qt.Edge.BottomEdge,
         __ResizableWidgetBorder.TOP: Qt.Edge.TopEdge,
@@ -239,16 +283,41 @@ class ResizableWidget(FramelessRoundedBorderWidget):
 
         self.setAttribute(WidgetAttributes.WA_NativeWindow, True)
 
-        # Resizing support
+        # Resizing support. Only this widget tracks the mouse: the border bands lie within the layout
+        # margins, and children are watched through an event filter for the pointer leaving the bands
         self.setMouseTracking(True)
 
         self.__resizeActive = False
         self.__offendingBorder = self.__ResizableWidgetBorder.UNSET
         self.__resizeEnabled = True
 
+        # Hover hit-testing runs on every mouse move, so its inputs are prepared ahead of time
+        self.__hoveredBorder = self.__ResizableWidgetBorder.UNSET
+        self.__bands = (0, 0, 0, 0)  # Left, right, top and bottom band edges
+        self.__updateBands()
+
     def setEnableResize(self, state):
         # type: (bool) -> None
         self.__resizeEnabled = state if type(state) is bool else True
+        if not self.__resizeEnabled:
+            self.__updateCursor(self.__ResizableWidgetBorder.UNSET)
+
+    def setBorderStyle(
+        self, borderColor=None, borderThickness=-1, borderRadius=-1, borderStyle=None
+    ):
+        # type: (QColor, int, int, BorderStyle | None) -> None
+        super().setBorderStyle(borderColor, borderThickness, borderRadius, borderStyle)
+        self.__updateBands()
+
+    def resizeEvent(self, event):
+        # type: (QtGui.QResizeEvent) -> None
+        self.__updateBands()
+        return super().resizeEvent(event)
+
+    def __updateBands(self):
+        w, h = self.width(), self.height()
+        thickness = self._borderStyle.thickness + 3  # added padding
+        self.__bands = (thickness, w - thickness, thickness, h - thickness)
 
     def isResizeEnabled(self):
         # type: () -> bool
@@ -326,6 +395,18 @@ class ResizableWidget(FramelessRoundedBorderWidget):
                 elif event.type() == QEvent.Type.MouseMove:
                     self.__updateCursor(self.__getHoveredBorder(relPosX, relPosY))
 
+        elif event.type() == QEvent.Type.ChildPolished:
+            child = event.child()
+            if child.isWidgetType():
+                child.installEventFilter(self)
+
+        elif event.type() == QEvent.Type.ChildRemoved:
+            event.child().removeEventFilter(self)
+
+        elif event.type() == QEvent.Type.Leave:
+            # Moves stop arriving once the pointer is outside, so the last border would stay cached
+            self.__updateCursor(self.__ResizableWidgetBorder.UNSET)
+
         elif event.type() == QEvent.Type.WindowActivate:
             if self.__resizeActive:
                 self.__resizeActive = False
@@ -333,8 +414,30 @@ class ResizableWidget(FramelessRoundedBorderWidget):
 
         return super().event(event)
 
+    def eventFilter(self, watched, event):
+        # type: (QObject, QEvent) -> bool
+        # Installed on the direct children, which don't track the mouse. Moving from a border band onto
+        # a child sends the child `Enter` but sends this widget no move, which would keep the resize cursor
+        eventType = event.type()
+        if eventType == QEvent.Type.Enter:
+            self.__updateCursor(self.__ResizableWidgetBorder.UNSET)
+        elif (
+            eventType == QEvent.Type.MouseMove
+            and self.__resizeEnabled
+            and event.buttons() == Qt.MouseButton.NoButton
+        ):
+            # A child that tracks the mouse may still overlap a band
+            pos = self.mapFromGlobal(event.globalPosition().toPoint())
+            self.__updateCursor(self.__getHoveredBorder(pos.x(), pos.y()))
+        return super().eventFilter(watched, event)
+
     def __updateCursor(self, border=None):
         # type: (__ResizableWidgetBorder) -> None
+        # The cursor only changes when the pointer crosses into another border
+        if border == self.__hoveredBorder:
+            return
+        self.__hoveredBorder = border
+
         cursor_shape = self.__BORDER_TO_CURSOR_SHAPE.get(border, None)
         if cursor_shape is not None:
             self.setCursor(cursor_shape)
@@ -343,23 +446,10 @@ class ResizableWidget(FramelessRoundedBorderWidget):
 
     def __getHoveredBorder(self, relPosX, relPosY):
         # type: ( int, int) -> __ResizableWidgetBorder
-        w, h = self.width(), self.height()
-        border = self.__ResizableWidgetBorder.UNSET
-        thickness = self._borderStyle.thickness + 3  # added padding
-
-        if relPosX <= 0 + thickness:
-            border |= self.__ResizableWidgetBorder.LEFT
-        elif w - thickness <= relPosX <= w or relPosX > w:
-            border |= self.__ResizableWidgetBorder.RIGHT
-
-        if relPosY <= 0 + thickness:
-            border |= self.__ResizableWidgetBorder.TOP
-        elif h - thickness <= relPosY <= h or relPosY > h:
-            border |= self.__ResizableWidgetBorder.BOTTOM
-
-        if border == self.__ResizableWidgetBorder.UNSET:
-            return border
-        return border ^ self.__ResizableWidgetBorder.UNSET
+        left, right, top, bottom = self.__bands
+        zoneX = -1 if relPosX <= left else (1 if relPosX >= right else 0)
+        zoneY = -1 if relPosY <= top else (1 if relPosY >= bottom else 0)
+        return self.__ZONES_TO_BORDER[(zoneX, zoneY)]
 
     def _isCursorInBorder(self, event):
         # type: (QMouseEvent) -> bool
@@ -404,7 +494,7 @@ class AppLabel(QLabel):
         else:
             super().__init__(txt, parent, f)
 
-        self.opacity = 1
+        self.opacity = 255
         self.FONTID = CUSTOM_FONT_ID.retrieve_font_id(fontName)
         if self.FONTID < 0:
             # QtCore.qDebug("Font couldn't load")
@@ -415,12 +505,22 @@ class AppLabel(QLabel):
             font.setPixelSize(pixelSize)
             self.setFont(font)
 
+        self.__textColor = QColor(255, 255, 255)
         self.setStyleSheet("color: rgba(255,255,255,255)")
 
     def setOpacity(self, value):
         # type: (float) -> None
         self.opacity = max(min(value, 1), 0) * 255
-        self.setStyleSheet(f"color: rgba(255,255,255, {self.opacity})")
+        self.__applyTextColor()
+
+    def setTextColor(self, color):
+        # type: (QColor) -> None
+        self.__textColor = QColor(color)
+        self.__applyTextColor()
+
+    def __applyTextColor(self):
+        c = self.__textColor
+        self.setStyleSheet(f"color: rgba({c.red()},{c.green()},{c.blue()}, {self.opacity})")
 
     def fadeIn(self, duration):
         # type: (int) -> None
@@ -630,53 +730,124 @@ class CustomImage(QLabel):
         super().__init__(parent)
 
         self.__currentSize = QSize(60, 60)
+        self.__reply = None  # type: QtNetwork.QNetworkReply | None
+        self.__decodeRequest = None  # type: int | None
+        self.__decodeSource = None  # Cache key of the image being decoded
+        self.__sourcePixmap = None  # type: QPixmap | None  # Unscaled image given to the constructor
         self.setScaledContents(True)
+        sharedImageDecoder().decoded.connect(self.__onImageDecoded)
 
         if isinstance(src, str):
             self.load_image_from_url(src)
         elif src is not None:
-            self.setPixmap(src)
+            self.__sourcePixmap = QPixmap.fromImage(src) if isinstance(src, QImage) else src
             self.resizeImage()
 
     def resetFixedSize(self):
         resetFixedSize(self)
 
+    def imageSize(self):
+        # type: () -> QSize
+        return QSize(self.__currentSize)
+
+    def targetPixelSize(self):
+        # type: () -> int
+        """Size in device pixels that the image needs to look sharp at the current size"""
+        return math.ceil(
+            max(self.__currentSize.width(), self.__currentSize.height())
+            * self.devicePixelRatioF()
+        )
+
+    def __cacheKey(self, source):
+        # type: (object) -> tuple
+        return pixmapKey(source, self.__currentSize, self.devicePixelRatioF())
+
     def resizeImage(self):
-        pixmap = self.pixmap()
-        if pixmap:
-            self.setPixmap(
-                pixmap.scaled(
-                    self.__currentSize,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation,
-                )
+        # Always scale from the original, never from an earlier scaled copy
+        source = self.__sourcePixmap
+        if source is None or source.isNull():
+            return
+
+        key = self.__cacheKey(("pixmap", source.cacheKey()))
+        pixmap = sharedPixmapCache().find(key)
+        if pixmap is None:
+            dpr = self.devicePixelRatioF()
+            pixmap = source.scaled(
+                self.__currentSize * dpr,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
             )
+            pixmap.setDevicePixelRatio(dpr)
+            sharedPixmapCache().insert(key, pixmap)
+        self.setPixmap(pixmap)
+
+    def showCachedImage(self, source):
+        # type: (object) -> bool
+        """Show the image of `source` (e.g. its url) if it is cached at the current size. Returns True if it was"""
+        pixmap = sharedPixmapCache().find(self.__cacheKey(source))
+        if pixmap is None:
+            return False
+
+        self.__decodeRequest = None
+        self.setPixmap(pixmap)
+        return True
 
-    @cache
     def networkManager(self):
-        manager = QtNetwork.QNetworkAccessManager(self)
-        manager.finished.connect(self._handle_reply)
-        return manager
+        # type: () -> QtNetwork.QNetworkAccessManager
+        return sharedNetworkManager()
+
+    def __onReplyFinished(self):
+        reply, self.__reply = self.__reply, None
+        if reply is not None:
+            self._handle_reply(reply)
+            reply.deleteLater()
 
     def _handle_reply(self, reply):
         # type: (QtNetwork.QNetworkReply,) -> None
 
         if reply.error() == QtNetwork.QNetworkReply.NetworkError.NoError:
+            QtCore.qDebug("load_image_from_url: Image Received")
+            self.load_image_from_data(reply.readAll(), reply.request().url().toString())
 
-            response_data = reply.readAll()
-            image = QImage()
+        else:
+            QtCore.qDebug("load_image_from_url: QNetworkReply Error!")
 
-            if image.loadFromData(response_data.data()):
-                QtCore.qDebug("load_image_from_url: Image Loaded")
+    def load_image_from_data(self, data, source=None):
+        # type: (bytes | QByteArray, object) -> None
+        """
+        Show an encoded image. It is decoded at the displayed size on a worker thread;
+        the image is cleared if it can't be decoded.
+
+        source: Id of the image (e.g. its url). The decoded pixmap is cached under it, and served
+                from the cache without decoding next time
+        """
+        if source is not None and self.showCachedImage(source):
+            return
+
+        self.__decodeSource = source
+        dpr = self.devicePixelRatioF()
+        targetSize = QSize(
+            math.ceil(self.__currentSize.width() * dpr),
+            math.ceil(self.__currentSize.height() * dpr),
+        )
+        self.__decodeRequest = sharedImageDecoder().decode(data, targetSize)
 
-                self.setPixmap(QPixmap(image))
-                self.resizeImage()
+    def __onImageDecoded(self, requestId, image):
+        # type: (int, QImage) -> None
+        if requestId != self.__decodeRequest:
+            return  # Another widget's image, or superseded by a newer one
+        self.__decodeRequest = None
 
-            else:
-                QtCore.qDebug("load_image_from_url: Image Not Loaded")
+        if image.isNull():
+            QtCore.qDebug("load_image_from_data: Image Not Loaded")
+            self.clear()
+            return
 
-        else:
-            QtCore.qDebug("load_image_from_url: QNetworkReply Error!")
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+        if self.__decodeSource is not None:
+            sharedPixmapCache().insert(self.__cacheKey(self.__decodeSource), pixmap)
+        self.setPixmap(pixmap)
 
     def load_image_from_url(self, url_str, new_size=None):
         # type: (str, QSize | None) -> None
@@ -687,10 +858,21 @@ class CustomImage(QLabel):
 
             if not url.isLocalFile():
                 QtCore.qDebug("load_image_from_url: url is not a local file")
-                QtNetwork.QNetworkProxyFactory.setUseSystemConfiguration(True)
             else:
                 QtCore.qDebug("load_image_from_url: url is a local file")
 
             if isinstance(new_size, QSize):
                 self.__currentSize = new_size
-            self.networkManager().get(QtNetwork.QNetworkRequest(url))
+
+            # Only the latest image matters
+            if self.__reply is not None:
+                self.__reply.finished.disconnect(self.__onReplyFinished)
+                self.__reply.abort()
+                self.__reply.deleteLater()
+                self.__reply = None
+
+            if self.showCachedImage(url.toString()):
+                return
+
+            self.__reply = cachedGet(url)
+            self.__reply.finished.connect(self.__onReplyFinished)
@@ -0,0 +1,93 @@
+import math
+
+from .qt_imports import QImage, QPainter, QPixmap, QSize, QSvgRenderer, Qt
+from .pixmap_cache import PixmapCache, pixmapKey
+from .resources import icons_rc
+
+
+class CONSTANTS:
+    __slots__ = ()
+    MAX_BYTES = 4 * 1024 * 1024
+
+
+def renderIcon(renderer, size, devicePixelRatio, tint=None):
+    # type: (QSvgRenderer, QSize, float, QColor | None) -> QPixmap
+    """Rasterise an SVG to `size` logical pixels, optionally painting every opaque pixel in `tint`"""
+    image = QImage(
+        math.ceil(size.width() * devicePixelRatio),
+        math.ceil(size.height() * devicePixelRatio),
+        QImage.Format.Format_ARGB32_Premultiplied,
+    )
+    image.fill(Qt.GlobalColor.transparent)
+
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+    renderer.render(painter)
+    if tint is not None:
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
+        painter.fillRect(image.rect(), tint)
+    painter.end()
+
+    pixmap = QPixmap.fromImage(image)
+    pixmap.setDevicePixelRatio(devicePixelRatio)
+    return pixmap
+
+
+class IconAtlas:
+    """
+    Ready-to-draw icons, rendered from SVG once per (path, size, device pixel ratio, tint).
+
+    Each SVG file is parsed once, and icons of the same kind share their pixmaps, so an icon widget
+    only has to draw a pixmap. Must only be used from the GUI thread.
+    """
+
+    def __init__(self, maxBytes=CONSTANTS.MAX_BYTES):
+        # type: (int) -> None
+        self.__renderers = {}  # type: dict[str, QSvgRenderer | None]
+        self.__pixmaps = PixmapCache(maxBytes)
+
+    def renderer(self, path):
+        # type: (str) -> QSvgRenderer | None
+        """The parsed SVG at `path` (e.g. ":/icons/Play.svg"), or None if it can't be loaded"""
+        if path not in self.__renderers:
+            renderer = QSvgRenderer(path)
+            self.__renderers[path] = renderer if renderer.isValid() else None
+        return self.__renderers[path]
+
+    def defaultSize(self, path):
+        # type: (str) -> QSize
+        renderer = self.renderer(path)
+        return renderer.defaultSize() if renderer is not None else QSize()
+
+    def pixmap(self, path, size, devicePixelRatio, tint=None):
+        # type: (str, QSize, float, QColor | None) -> QPixmap | None
+        if size.isEmpty():
+            return None
+        renderer = self.renderer(path)
+        if renderer is None:
+            return None
+
+        source = (path, tint.rgba() if tint is not None else None)
+        key = pixmapKey(source, size, devicePixelRatio)
+        pixmap = self.__pixmaps.find(key)
+        if pixmap is None:
+            pixmap = renderIcon(renderer, size, devicePixelRatio, tint)
+            self.__pixmaps.insert(key, pixmap)
+        return pixmap
+
+    def clear(self):
+        # type: () -> None
+        self.__pixmaps.clear()
+
+
+_SHARED_ATLAS = None  # type: IconAtlas | None
+
+
+def sharedIconAtlas():
+    # type: () -> IconAtlas
+    """The application-wide atlas used by the icon widgets"""
+    global _SHARED_ATLAS
+
+    if _SHARED_ATLAS is None:
+        _SHARED_ATLAS = IconAtlas()
+    return _SHARED_ATLAS
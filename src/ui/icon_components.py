@@ -7,15 +7,25 @@ from .qt_imports import (
     QFrame,
     WindowTypes,
     CursorShape,
-    WidgetAttributes,
-    QVBoxLayout,
-    QSvgWidget,
+    QColor,
     QMouseEvent,
+    QPainter,
+    QPixmap,
+    QPaintEvent,
+    QSize,
     Qt,
 )
+from .icon_atlas import IconAtlas, sharedIconAtlas
 
 
 class ClickableSvgWidget(QFrame):
+    """
+    Clickable icon that draws its SVG from the shared `IconAtlas`.
+
+    The SVG is rasterised once per size, device pixel ratio and tint, and shared by every icon showing it,
+    so changing the icon only swaps pixmaps.
+    """
+
     def __init__(
         self,
         parent: QWidget | None = ...,
@@ -32,24 +42,64 @@ class ClickableSvgWidget(QFrame):
 
         self.setCursor(CursorShape.PointingHandCursor)
         self.__btnPressCallback = msBtnPressCallback
-        self.__svgWidget = (
-            QSvgWidget(svgFilePath, self)
-            if svgFilePath and isinstance(svgFilePath, str)
-            else QWidget(self)
-        )
+        self.__atlas = sharedIconAtlas()  # type: IconAtlas
+        self.__svgFilePath = ""
+        self.__tint = None  # type: QColor | None
+
+        self.setSvgFilePath(svgFilePath)
 
-        self.__svgWidget.setAttribute(
-            WidgetAttributes.WA_TransparentForMouseEvents, True
+    def svgWidget(self):
+        # type: () -> ClickableSvgWidget
+        # The icon is painted by the widget itself
+        return self
+
+    def svgFilePath(self):
+        # type: () -> str
+        return self.__svgFilePath
+
+    def setSvgFilePath(self, path):
+        # type: (str) -> None
+        path = path if path and isinstance(path, str) else ""
+        if path != self.__svgFilePath:
+            self.__svgFilePath = path
+            self.updateGeometry()
+            self.update()
+
+    def tint(self):
+        # type: () -> QColor | None
+        return self.__tint
+
+    def setTint(self, color):
+        # type: (QColor | None) -> None
+        """Paint the icon in a single colour, or in its own colours if `color` is None"""
+        self.__tint = QColor(color) if color is not None else None
+        self.update()
+
+    def iconPixmap(self, path=None):
+        # type: (str | None) -> QPixmap | None
+        """The pixmap drawn for `path` (the current SVG by default) at the widget's current size"""
+        path = self.__svgFilePath if path is None else path
+        if not path:
+            return None
+        return self.__atlas.pixmap(
+            path, self.contentsRect().size(), self.devicePixelRatioF(), self.__tint
         )
 
-        vBox = QVBoxLayout(self)
-        vBox.addWidget(self.__svgWidget)
-        self.setLayout(vBox)
-        vBox.setContentsMargins(0, 0, 0, 0)
+    def sizeHint(self):
+        # type: () -> QSize
+        if not self.__svgFilePath:
+            return super().sizeHint()
+        return self.__atlas.defaultSize(self.__svgFilePath)
 
-    def svgWidget(self):
-        # type: () -> QSvgWidget
-        return self.__svgWidget
+    def paintEvent(self, event):
+        # type: (QPaintEvent) -> None
+        pixmap = self.iconPixmap()
+        if pixmap is None:
+            return super().paintEvent(event)
+
+        painter = QPainter(self)
+        painter.drawPixmap(self.contentsRect().topLeft(), pixmap)
+        painter.end()
 
     def event(self, ev):
         # type: (QEvent | QMouseEvent) -> None
@@ -69,28 +119,6 @@ class ClickableSvgWidget(QFrame):
 
         return super().event(ev)
 
-    def setSvgFilePath(self, path):
-        # type: (str) -> None
-        self._replaceInnerWidget(
-            QSvgWidget(path, self) if path and isinstance(path, str) else QWidget(self)
-        )
-
-    def _replaceInnerWidget(self, svgWidget):
-        # type: (QSvgWidget)  -> QSvgWidget
-        # Returns the old, replaced widget
-        if not svgWidget:
-            return self.__svgWidget
-        if not isinstance(svgWidget, QWidget):
-            raise TypeError("svgWidget must be an instance of QWidget")
-
-        layout = self.layout()
-        layout.replaceWidget(
-            self.__svgWidget, svgWidget, Qt.FindChildOption.FindChildrenRecursively
-        )
-        prev_widget, self.__svgWidget = self.__svgWidget, svgWidget
-
-        return prev_widget
-
 
 class AppIcon(ClickableSvgWidget):
     def __init__(self, parent, svgFilePath, callback):
@@ -109,53 +137,50 @@ class TwoStateIcon(AppIcon):
     def __init__(self, parent, stateAIcon, stateBIcon, stateACallback, stateBCallback):
         # type: (QWidget| None, str | None, str | None, Callable[[QEvent], None], Callable[[QEvent], None]) -> None
 
-        super().__init__(parent, "", None)
+        super().__init__(parent, stateAIcon, self.__onPressed)
 
+        self.__stateAIcon = stateAIcon if stateAIcon else ""
+        self.__stateBIcon = stateBIcon if stateBIcon else ""
         self.__stateACallback = stateACallback
         self.__stateBCallback = stateBCallback
 
-        def _stateACallback(ev):
-            # type: (QEvent | None) -> None
+        self.__is_state_A = None
+        self.__changeState(True)
+
+    def __onPressed(self, ev):
+        # type: (QEvent | None) -> None
+        if self.__is_state_A:
             self.__stateACallback(ev)
             self.__changeState(False)
-
-        def _stateBCallback(ev):
-            # type: (QEvent | None) -> None
+        else:
             self.__stateBCallback(ev)
             self.__changeState(True)
 
-        self.__iconA = AppIcon(self, stateAIcon, _stateACallback)
-        self.__iconB = AppIcon(self, stateBIcon, _stateBCallback)
-
-        self.__is_state_A = None
-        self.__iconA.hide()
-        self.__iconB.hide()
-
-        self.__changeState(True)
-
     def __changeState(self, to_state_A):
         # type: (bool) -> None
 
         if self.__is_state_A != to_state_A:
             self.__is_state_A = to_state_A
+            self.setSvgFilePath(self.__stateAIcon if to_state_A else self.__stateBIcon)
 
-            prev_widget = None
-            if to_state_A:
-                prev_widget = self._replaceInnerWidget(self.__iconA)
-            else:
-                prev_widget = self._replaceInnerWidget(self.__iconB)
+    def isStateA(self):
+        # type: () -> bool
+        return bool(self.__is_state_A)
 
-            if prev_widget:
-                prev_widget.hide()
-
-            curr_widget = self.svgWidget()
-            if curr_widget:
-                curr_widget.show()
+    def setStateA(self, isStateA):
+        # type: (bool) -> None
+        """Show the icon of the given state without calling either callback"""
+        self.__changeState(isStateA)
 
     def setFixedSizeAppIcons(self, width, height):
         # type: (int, int) -> None
-        self.__iconA.setFixedSize(width, height)
-        self.__iconB.setFixedSize(width, height)
+        self.setFixedSize(width, height)
+
+    def resizeEvent(self, event):
+        # Render both states at the new size up front, so toggling never rasterises
+        self.iconPixmap(self.__stateAIcon)
+        self.iconPixmap(self.__stateBIcon)
+        return super().resizeEvent(event)
 
 
 class PlayPauseIcon(TwoStateIcon):
@@ -0,0 +1,86 @@
+import itertools
+
+from .qt_imports import (
+    QBuffer,
+    QByteArray,
+    QImage,
+    QImageReader,
+    QIODevice,
+    QObject,
+    QSize,
+    QThreadPool,
+    Signal,
+    Qt,
+)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    MAX_THREADS = 2
+
+
+def decodeImage(data, targetSize):
+    # type: (bytes | QByteArray, QSize) -> QImage
+    """
+    Decode an encoded image straight to at most `targetSize` (in device pixels), keeping its aspect ratio.
+
+    `QImageReader` scales while decoding, so a large JPEG is never materialised at full size.
+    Returns a null image if the data can't be decoded. Safe to call from any thread.
+    """
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+
+    size = reader.size()
+    if size.isValid() and targetSize.isValid():
+        scaled = size.scaled(targetSize, Qt.AspectRatioMode.KeepAspectRatio)
+        if scaled.width() < size.width():
+            reader.setScaledSize(scaled)
+
+    return reader.read()
+
+
+class ImageDecoder(QObject):
+    """
+    Decode images on a small thread pool and deliver the finished `QImage`s to the owner's thread.
+
+    decoded: Emitted with the request id returned by `decode` and the image (null if decoding failed)
+    """
+
+    decoded = Signal(int, QImage)
+
+    def __init__(self, parent=None):
+        # type: (QObject | None) -> None
+        super().__init__(parent)
+        self.__ids = itertools.count(1)
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(CONSTANTS.MAX_THREADS)
+
+    def decode(self, data, targetSize):
+        # type: (bytes | QByteArray, QSize) -> int
+        requestId = next(self.__ids)
+        decoded = self.decoded
+        targetSize = QSize(targetSize)
+
+        def run():
+            # Emitted from the pool thread, so receivers in the GUI thread get a queued call
+            decoded.emit(requestId, decodeImage(data, targetSize))
+
+        self.__pool.start(run)
+        return requestId
+
+
+_SHARED_DECODER = None  # type: ImageDecoder | None
+
+
+def sharedImageDecoder():
+    # type: () -> ImageDecoder
+    """The application-wide decoder. Must be first used from the GUI thread"""
+    global _SHARED_DECODER
+
+    if _SHARED_DECODER is None:
+        _SHARED_DECODER = ImageDecoder()
+    return _SHARED_DECODER
@@ -0,0 +1,57 @@
+import os
+
+from .qt_imports import QApplication, QUrl, QtNetwork
+
+
+class CONSTANTS:
+    __slots__ = ()
+    DISK_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".showlyrics", "http_cache")
+    DISK_CACHE_BYTES = 64 * 1024 * 1024
+
+
+_SHARED_MANAGER = None  # type: QtNetwork.QNetworkAccessManager | None
+
+
+def sharedNetworkManager():
+    # type: () -> QtNetwork.QNetworkAccessManager
+    """
+    The application-wide network manager. Must be used from the GUI thread.
+
+    One manager means one connection pool (and HTTP/2 session) per host, and a `QNetworkDiskCache`
+    shared by every request, so reloading an image is answered from disk.
+
+    `CustomImage` loads arbitrary urls through it, so HTTP cache headers are honoured and `qrc:` and
+    `data:` urls work. Album art, whose CDN urls never change, goes through `AlbumArtService` instead.
+    """
+    global _SHARED_MANAGER
+
+    if _SHARED_MANAGER is None:
+        QtNetwork.QNetworkProxyFactory.setUseSystemConfiguration(True)
+
+        # Parented to the application so it is destroyed with it, not with any widget
+        manager = QtNetwork.QNetworkAccessManager(QApplication.instance())
+
+        cache = QtNetwork.QNetworkDiskCache(manager)
+        cache.setCacheDirectory(CONSTANTS.DISK_CACHE_DIR)
+        cache.setMaximumCacheSize(CONSTANTS.DISK_CACHE_BYTES)
+        manager.setCache(cache)
+
+        _SHARED_MANAGER = manager
+
+    return _SHARED_MANAGER
+
+
+def cachedGet(url):
+    # type: (QUrl) -> QtNetwork.QNetworkReply
+    """
+    GET `url` through the shared manager, preferring the disk cache over revalidation.
+
+    Connect to the returned reply's `finished` signal; the caller owns the reply and should `deleteLater` it.
+    """
+    request = QtNetwork.QNetworkRequest(url)
+    request.setAttribute(
+        QtNetwork.QNetworkRequest.Attribute.CacheLoadControlAttribute,
+        QtNetwork.QNetworkRequest.CacheLoadControl.PreferCache,
+    )
+    request.setAttribute(QtNetwork.QNetworkRequest.Attribute.Http2AllowedAttribute, True)
+    return sharedNetworkManager().get(request)
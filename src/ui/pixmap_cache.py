@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from typing import Hashable
+
+from .qt_imports import QPixmap, QSize
+
+
+class CONSTANTS:
+    __slots__ = ()
+    MAX_BYTES = 32 * 1024 * 1024
+
+
+def pixmapKey(source, size, devicePixelRatio):
+    # type: (Hashable, QSize, float) -> tuple
+    """Cache key of `source` (an image url or any other id) rendered at `size` logical pixels"""
+    return (source, size.width(), size.height(), round(devicePixelRatio, 2))
+
+
+def pixmapBytes(pixmap):
+    # type: (QPixmap) -> int
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
+
+
+class PixmapCache:
+    """
+    Least recently used cache of ready-to-draw pixmaps, budgeted in bytes.
+
+    Unlike `QPixmapCache`, keys can be any hashable value, so entries are keyed with `pixmapKey`
+    and the same artwork is kept once per size and device pixel ratio it is shown at.
+    Pixmaps belong to the GUI thread, so the cache must only be used there.
+    """
+
+    def __init__(self, maxBytes=CONSTANTS.MAX_BYTES):
+        # type: (int) -> None
+        self.maxBytes = maxBytes
+        self.__pixmaps = OrderedDict()  # type: OrderedDict[Hashable, QPixmap]
+        self.__totalBytes = 0
+
+    def __len__(self):
+        return len(self.__pixmaps)
+
+    def totalBytes(self):
+        # type: () -> int
+        return self.__totalBytes
+
+    def find(self, key):
+        # type: (Hashable) -> QPixmap | None
+        pixmap = self.__pixmaps.get(key, None)
+        if pixmap is not None:
+            self.__pixmaps.move_to_end(key)
+        return pixmap
+
+    def insert(self, key, pixmap):
+        # type: (Hashable, QPixmap) -> None
+        size = pixmapBytes(pixmap)
+        if pixmap.isNull() or size > self.maxBytes:
+            return
+
+        self.remove(key)
+        self.__pixmaps[key] = pixmap
+        self.__totalBytes += size
+
+        while self.__totalBytes > self.maxBytes:
+            _, evicted = self.__pixmaps.popitem(last=False)
+            self.__totalBytes -= pixmapBytes(evicted)
+
+    def remove(self, key):
+        # type: (Hashable) -> None
+        pixmap = self.__pixmaps.pop(key, None)
+        if pixmap is not None:
+            self.__totalBytes -= pixmapBytes(pixmap)
+
+    def clear(self):
+        # type: () -> None
+        self.__pixmaps.clear()
+        self.__totalBytes = 0
+
+
+_SHARED_CACHE = None  # type: PixmapCache | None
+
+
+def sharedPixmapCache():
+    # type: () -> PixmapCache
+    """The application-wide cache, shared by `CustomImage` and any other artwork drawn by the UI"""
+    global _SHARED_CACHE
+
+    if _SHARED_CACHE is None:
+        _SHARED_CACHE = PixmapCache()
+    return _SHARED_CACHE
@@ -0,0 +1,184 @@
+import logging
+from typing import Callable
+
+from .qt_imports import QObject, QThreadPool, QTimer, Signal, Qt
+from .playback_worker import PlaybackWorker
+from ..models.lyrics.spotify_session import PlaybackSession
+from ..models.lyrics.track_events import PlaybackEvent, PlaybackEventType
+
+logger = logging.getLogger(__name__)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    SEEK_DEBOUNCE_MS = 350  # Seeks closer together than this are sent as one request
+    REWIND_STEP_MS = 5000
+
+
+class PlaybackController(QObject):
+    """
+    Play, pause and seek with optimistic updates.
+
+    Each command moves the worker's `PlaybackClock` and emits `playStateChanged` at once, then runs on a
+    single-thread pool so commands reach the player in order without blocking the GUI. Quick repeated seeks
+    are merged into one request for their combined offset. Polls that may predate a command are dropped
+    (see `PendingCommands`), so the first poll afterwards reconciles local state; a failed command is
+    rolled back immediately.
+
+    playStateChanged: Emitted with the new play state, optimistic or confirmed
+    commandFailed: Emitted with the error message when a command could not be sent
+    """
+
+    playStateChanged = Signal(bool)
+    commandFailed = Signal(str)
+
+    _commandFinished = Signal(int, object)  # Command id, exception or None
+
+    def __init__(self, worker, parent=None):
+        # type: (PlaybackWorker, QObject | None) -> None
+        super().__init__(parent)
+        self.__worker = worker
+        self.__rollbacks = {}  # type: dict[int, Callable[[], None]]
+
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(1)  # Commands must not overtake each other
+
+        self.__seekCommandId = None  # type: int | None
+        self.__pendingSeekMs = 0
+        self.__seekTimer = QTimer(self)
+        self.__seekTimer.setSingleShot(True)
+        self.__seekTimer.setInterval(CONSTANTS.SEEK_DEBOUNCE_MS)
+        self.__seekTimer.timeout.connect(self.__flushSeek)
+
+        self._commandFinished.connect(
+            self.__onCommandFinished, Qt.ConnectionType.QueuedConnection
+        )
+        worker.playbackEvents.connect(self.__onPlaybackEvents)
+
+    def isPlaying(self):
+        # type: () -> bool
+        return self.__worker.clock.is_playing
+
+    def play(self):
+        # type: () -> None
+        self.__setPlaying(True)
+
+    def pause(self):
+        # type: () -> None
+        self.__setPlaying(False)
+
+    def togglePlayPause(self):
+        # type: () -> None
+        self.__setPlaying(not self.isPlaying())
+
+    def seekBy(self, offsetMs):
+        # type: (int) -> None
+        """Move the position by `offsetMs` now; the request is sent once the seeks stop coming"""
+        clock = self.__worker.clock
+        position = clock.position_ms()
+        if position < 0:
+            return
+
+        clock.apply_local(position_ms=max(0, position + offsetMs))
+        self.__pendingSeekMs += clock.position_ms() - position
+
+        # Hold polls back from the first click on, or one could land before the request and undo the seek
+        if self.__seekCommandId is None:
+            self.__seekCommandId = self.__worker.commands.begin()
+        self.__seekTimer.start()
+
+    def rewind(self, forward):
+        # type: (bool) -> None
+        self.seekBy(CONSTANTS.REWIND_STEP_MS if forward else -CONSTANTS.REWIND_STEP_MS)
+
+    def __setPlaying(self, playing):
+        # type: (bool) -> None
+        # A pending seek is sent first so the player sees commands in the order they were made
+        self.__flushSeek()
+
+        clock = self.__worker.clock
+        previous = clock.is_playing
+        commandId = self.__worker.commands.begin()
+
+        clock.apply_local(is_playing=playing)
+        self.playStateChanged.emit(playing)
+
+        def rollback():
+            clock.apply_local(is_playing=previous)
+            self.playStateChanged.emit(previous)
+
+        if playing:
+            self.__submit(commandId, lambda session: session.play(), rollback)
+        else:
+            self.__submit(commandId, lambda session: session.pause(), rollback)
+
+    def __flushSeek(self):
+        self.__seekTimer.stop()
+        commandId, self.__seekCommandId = self.__seekCommandId, None
+        offset, self.__pendingSeekMs = self.__pendingSeekMs, 0
+        if commandId is None:
+            return
+
+        clock = self.__worker.clock
+        target = clock.position_ms()
+
+        def rollback():
+            position = clock.position_ms()
+            if position >= 0:
+                clock.apply_local(position_ms=max(0, position - offset))
+
+        if offset == 0:
+            # The seeks cancelled out
+            self.__worker.commands.finish(commandId)
+            return
+        self.__submit(commandId, lambda session: session.seek(target), rollback)
+
+    def __submit(self, commandId, command, rollback):
+        # type: (int, Callable[[PlaybackSession], None], Callable[[], None]) -> None
+        self.__rollbacks[commandId] = rollback
+        worker = self.__worker
+        finished = self._commandFinished
+
+        def run():
+            error = None
+            try:
+                session = worker.session()
+                if session is None:
+                    raise RuntimeError("The playback source isn't connected yet")
+                command(session)
+            except Exception as e:
+                error = e
+            finished.emit(commandId, error)
+
+        self.__pool.start(run)
+
+    def __onCommandFinished(self, commandId, error):
+        # type: (int, Exception | None) -> None
+        self.__worker.commands.finish(commandId)
+        rollback = self.__rollbacks.pop(commandId, None)
+
+        if error is not None:
+            logger.warning("Playback command failed", exc_info=error)
+            if rollback is not None:
+                rollback()
+            self.commandFailed.emit(str(error))
+
+        # Poll right away (and quickly for a while) to reconcile with the player
+        self.__worker.notifyUserAction()
+
+    def __onPlaybackEvents(self, events):
+        # type: (list[PlaybackEvent]) -> None
+        for event in events:
+            if event.type in (
+                PlaybackEventType.TRACK_CHANGED,
+                PlaybackEventType.PLAY_STATE_CHANGED,
+            ):
+                self.playStateChanged.emit(
+                    event.track is not None and event.track.is_playing
+                )
+
+    def waitForDone(self):
+        # type: () -> None
+        """Send any pending seek and block until every command has returned"""
+        self.__flushSeek()
+        self.__pool.waitForDone()
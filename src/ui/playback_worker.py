@@ -0,0 +1,342 @@
+import logging, threading
+from collections import deque
+from typing import Callable
+
+from .qt_imports import QObject, QThread, QTimer, Signal, Slot, Qt
+from ..models.lyrics.api import get_playback_source
+from ..models.lyrics.data_types import TrackDetails
+from ..models.lyrics.spotify_session import PlaybackSession, PlaybackStatus, PollResult
+from ..models.lyrics.poll_scheduler import PollScheduler
+from ..models.lyrics.playback_clock import PlaybackClock
+from ..models.lyrics.playback_commands import PendingCommands
+from ..models.lyrics.track_events import (
+    TrackEventStream,
+    PlaybackEvent,
+    PlaybackEventType,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CONSTANTS:
+    __slots__ = ()
+    MAX_PENDING_EVENTS = 32
+    SESSION_RETRY_DELAY_S = 30  # Wait before retrying after the session couldn't be created
+    STOP_TIMEOUT_MS = 1000  # Longest `stop` waits for the worker thread. Requests in progress aren't waited for
+
+
+class PlaybackMailbox:
+    """
+    Bounded hand-off from the polling thread to the GUI thread.
+
+    Only the latest track is kept, along with at most `maxEvents` events, and the consumer is notified
+    once per batch. A GUI thread that falls behind therefore receives one coalesced update instead of
+    a growing backlog of signals.
+    """
+
+    def __init__(self, maxEvents=CONSTANTS.MAX_PENDING_EVENTS):
+        # type: (int) -> None
+        self.__lock = threading.Lock()
+        self.__track = None  # type: TrackDetails | None
+        self.__events = deque(maxlen=maxEvents)  # type: deque[PlaybackEvent]
+        self.__pending = False
+
+    def post(self, track, events):
+        # type: (TrackDetails | None, list[PlaybackEvent]) -> bool
+        # Returns True if the consumer has to be notified
+        with self.__lock:
+            self.__track = track
+            self.__events.extend(events)
+            notify = not self.__pending
+            self.__pending = True
+            return notify
+
+    def take(self):
+        # type: () -> tuple[TrackDetails | None, list[PlaybackEvent]]
+        with self.__lock:
+            events = list(self.__events)
+            self.__events.clear()
+            self.__pending = False
+            return self.__track, events
+
+
+def _closeSession(session):
+    # type: (PlaybackSession | None) -> None
+    # Releases the session's refresh timer and connections
+    if session is not None and hasattr(session, "close"):
+        try:
+            session.close()
+        except Exception:
+            logger.warning("Closing the playback session failed", exc_info=True)
+
+
+class _PlaybackPoller(QObject):
+    """
+    Lives on the worker thread and owns the session.
+
+    The blocking calls (creating the session, which may mean an interactive login, and each poll) run
+    on a daemon thread whose result is handed back to the worker thread. The worker thread's event loop
+    therefore never blocks, so stopping is immediate and never has to wait for, or kill, a request.
+    """
+
+    updatesPosted = Signal()
+    _changePushed = Signal()
+    _pollFinished = Signal(int, object, object, float, float)  # Generation, session, PollResult or None, sent at, received at
+
+    def __init__(self, sessionFactory, scheduler, clock, eventStream, mailbox, commands, stopping, stopLock):
+        # type: (Callable[[], PlaybackSession], PollScheduler, PlaybackClock, TrackEventStream, PlaybackMailbox, PendingCommands, threading.Event, threading.Lock) -> None
+        super().__init__(None)
+        self.__stopping = stopping  # Set from the GUI thread, under `stopLock`
+        self.__stopLock = stopLock
+        self.__sessionFactory = sessionFactory
+        self.__scheduler = scheduler
+        self.__clock = clock
+        self.__eventStream = eventStream
+        self.__mailbox = mailbox
+        self.__commands = commands
+        self.__session = None  # type: PlaybackSession | None
+        self.__timer = None  # type: QTimer | None
+        self.__generation = 0  # Bumped on stop, so results of requests from before a restart are dropped
+        self.__inFlight = False
+        self.__pollAgain = False
+
+        # Push sources report changes from their own thread
+        self._changePushed.connect(self.pollNow, Qt.ConnectionType.QueuedConnection)
+        self._pollFinished.connect(
+            self.__onPollFinished, Qt.ConnectionType.QueuedConnection
+        )
+
+    def session(self):
+        # type: () -> PlaybackSession | None
+        return self.__session
+
+    @Slot()
+    def start(self):
+        # The timer must be created on the worker thread so that it fires there
+        if self.__timer is None:
+            self.__timer = QTimer(self)
+            self.__timer.setSingleShot(True)
+            self.__timer.timeout.connect(self.__poll)
+        self.__timer.start(0)
+
+    @Slot()
+    def pollNow(self):
+        if self.__timer is None:
+            return
+        if self.__inFlight:
+            self.__pollAgain = True
+        else:
+            self.__timer.start(0)
+
+    @Slot()
+    def stop(self):
+        if self.__timer is not None:
+            self.__timer.stop()
+        self.__generation += 1
+        self.__inFlight = False
+        self.__pollAgain = False
+
+        session, self.__session = self.__session, None
+        _closeSession(session)
+
+        # Quitting from here, rather than from the GUI thread, lets this slot run before the event loop ends
+        self.thread().quit()
+
+    def __poll(self):
+        if self.__stopping.is_set() or self.__inFlight:
+            return
+
+        self.__inFlight = True
+        threading.Thread(
+            target=self.__request,
+            args=(self.__generation, self.__session),
+            name="PlaybackPoll",
+            daemon=True,
+        ).start()
+
+    def __request(self, generation, session):
+        # type: (int, PlaybackSession | None) -> None
+        # Runs on a daemon thread
+        result, sentAt, receivedAt = None, 0.0, 0.0
+        if session is None:
+            try:
+                session = self.__sessionFactory()
+            except Exception:
+                logger.warning("Creating the playback session failed", exc_info=True)
+
+        if session is not None:
+            try:
+                sentAt = self.__clock.now()
+                result = session.poll()
+                receivedAt = self.__clock.now()
+            except Exception:
+                logger.warning("Polling the playback session failed", exc_info=True)
+
+        with self.__stopLock:
+            if not self.__stopping.is_set():
+                self._pollFinished.emit(generation, session, result, sentAt, receivedAt)
+                return
+
+        # Stopped while the request ran (e.g. during login); nobody else will close a new session
+        _closeSession(session)
+
+    def __onPollFinished(self, generation, session, result, sentAt, receivedAt):
+        # type: (int, PlaybackSession | None, PollResult | None, float, float) -> None
+        if generation != self.__generation:
+            # Started before a stop; its session was replaced or closed
+            if session is not self.__session:
+                _closeSession(session)
+            return
+        self.__inFlight = False
+
+        if session is None:
+            self.__timer.start(int(CONSTANTS.SESSION_RETRY_DELAY_S * 1000))
+            return
+
+        if session is not self.__session:
+            self.__session = session
+            if hasattr(session, "on_change"):
+                session.on_change = self._changePushed.emit
+
+        retryAfter = 0.0
+        # A result that may predate a playback command is dropped rather than undoing its optimistic update
+        if (
+            result is not None
+            and result.status in (PlaybackStatus.OK, PlaybackStatus.NOTHING_PLAYING)
+            and self.__commands.accepts(sentAt)
+        ):
+            track = result.track
+            sampledAt = (sentAt + receivedAt) / 2
+
+            if track is not None:
+                self.__clock.record(
+                    track.ms_remote,
+                    track.is_playing,
+                    sentAt,
+                    receivedAt,
+                    track.duration_ms,
+                    track.identity,
+                )
+            else:
+                self.__clock.reset()
+
+            self.__scheduler.on_poll(track, sampledAt)
+            events = self.__eventStream.update(track, sampledAt)
+            if events and self.__mailbox.post(track, events):
+                self.updatesPosted.emit()
+
+        if result is not None:
+            retryAfter = result.retry_after_s
+
+        delay = max(self.__scheduler.next_poll_delay(), retryAfter)
+        if self.__pollAgain:
+            self.__pollAgain = False
+            delay = retryAfter
+        self.__timer.start(int(delay * 1000))
+
+
+class PlaybackWorker(QObject):
+    """
+    Polls Spotify playback on a dedicated `QThread` and reports changes to the GUI thread through queued signals.
+
+    Sources that push changes (`MprisPlaybackSource`) are read as soon as they report one.
+
+    trackChanged: Emitted with the new `TrackDetails` (or None) when a different track starts
+    playbackEvents: Emitted with the list of `PlaybackEvent`s collected since the last delivery
+    """
+
+    trackChanged = Signal(object)
+    playbackEvents = Signal(list)
+
+    _startRequested = Signal()
+    _pollRequested = Signal()
+    _stopRequested = Signal()
+
+    def __init__(self, parent=None, sessionFactory=None, scheduler=None, clock=None):
+        # type: (QObject | None, Callable[[], PlaybackSession] | None, PollScheduler | None, PlaybackClock | None) -> None
+        super().__init__(parent)
+
+        self.scheduler = scheduler if scheduler is not None else PollScheduler()
+        self.clock = clock if clock is not None else PlaybackClock()
+        self.eventStream = TrackEventStream()
+        self.commands = PendingCommands(self.clock.now)
+        self.__mailbox = PlaybackMailbox()
+        self.__stopping = threading.Event()
+        self.__stopLock = threading.Lock()
+
+        self.__thread = QThread()
+        self.__thread.setObjectName("PlaybackWorker")
+        self.__poller = _PlaybackPoller(
+            sessionFactory if sessionFactory is not None else get_playback_source,
+            self.scheduler,
+            self.clock,
+            self.eventStream,
+            self.__mailbox,
+            self.commands,
+            self.__stopping,
+            self.__stopLock,
+        )
+        self.__poller.moveToThread(self.__thread)
+
+        self._startRequested.connect(self.__poller.start)
+        self._pollRequested.connect(self.__poller.pollNow)
+        self._stopRequested.connect(self.__poller.stop)
+        self.__poller.updatesPosted.connect(
+            self.__deliverUpdates, Qt.ConnectionType.QueuedConnection
+        )
+        # The poller is kept across stop and start; it is deleted along with the worker
+
+    def session(self):
+        # type: () -> PlaybackSession | None
+        return self.__poller.session()
+
+    def isRunning(self):
+        # type: () -> bool
+        return self.__thread.isRunning()
+
+    def start(self):
+        # type: () -> None
+        if not self.__thread.isRunning():
+            self.__stopping.clear()
+            self.__thread.start()
+        self._startRequested.emit()
+
+    def stop(self, timeoutMs=CONSTANTS.STOP_TIMEOUT_MS):
+        # type: (int) -> None
+        """
+        Stop polling and close the session. A request still in progress (e.g. waiting on an interactive
+        login) is left to finish on its daemon thread, which closes any session it created.
+        """
+        if not self.__thread.isRunning():
+            return
+
+        with self.__stopLock:
+            self.__stopping.set()
+        self._stopRequested.emit()
+        if not self.__thread.wait(timeoutMs):
+            logger.warning("The playback worker thread didn't stop in %dms", timeoutMs)
+
+    def pollNow(self):
+        # type: () -> None
+        self._pollRequested.emit()
+
+    def notifyUserAction(self):
+        # type: () -> None
+        """Playback was changed from this app. Poll immediately and keep polling quickly for a while"""
+        self.scheduler.notify_user_action()
+        self.pollNow()
+
+    def setVisible(self, visible):
+        # type: (bool) -> None
+        self.scheduler.set_visible(visible)
+        if visible:
+            self.pollNow()
+
+    def __deliverUpdates(self):
+        track, events = self.__mailbox.take()
+        if not events:
+            return
+
+        if any(e.type == PlaybackEventType.TRACK_CHANGED for e in events):
+            self.trackChanged.emit(track)
+        self.playbackEvents.emit(events)
@@ -24,15 +24,22 @@ from PySide6.QtSvgWidgets import QSvgWidget
 import PySide6.QtNetwork as QtNetwork
 
 Qt = QtCore.Qt
+QBuffer = QtCore.QBuffer
 QByteArray = QtCore.QByteArray
 QEasingCurve = QtCore.QEasingCurve
 QEvent = QtCore.QEvent
+QIODevice = QtCore.QIODevice
 QObject = QtCore.QObject
 QPropertyAnimation = QtCore.QPropertyAnimation
 QSize = QtCore.QSize
 QRect = QtCore.QRect
 QPoint = QtCore.QPoint
 QUrl = QtCore.QUrl
+QThread = QtCore.QThread
+QThreadPool = QtCore.QThreadPool
+QTimer = QtCore.QTimer
+Signal = QtCore.Signal
+Slot = QtCore.Slot
 
 AlignmentFlag = Qt.AlignmentFlag
 ApplicationAttributes = Qt.ApplicationAttribute
@@ -57,6 +64,7 @@ QFontDatabase = QtGui.QFontDatabase
 QHoverEvent = QtGui.QHoverEvent
 QIcon = QtGui.QIcon
 QImage = QtGui.QImage
+QImageReader = QtGui.QImageReader
 QMouseEvent = QtGui.QMouseEvent
 QPainter = QtGui.QPainter
 QPainterPath = QtGui.QPainterPath
@@ -65,4 +73,7 @@ QPen = QtGui.QPen
 QPaintEvent = QtGui.QPaintEvent
 QPalette = QtGui.QPalette
 QPixmap = QtGui.QPixmap
+QRegion = QtGui.QRegion
 QWindow = QtGui.QWindow
+
+QSvgRenderer = QtSvg.QSvgRenderer
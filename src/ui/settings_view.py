@@ -1,4 +1,4 @@
-from .qt_imports import QWidget, QLabel, QVBoxLayout
+from .qt_imports import QWidget, QLabel, QVBoxLayout, Signal
 from .generic_view_components import (
     GenericWindowView,
     CustomHorizontalLayout,
@@ -11,6 +11,8 @@ from .generic_view_components import (
 
 
 class SettingsView(GenericWindowView):
+    autoThemeToggled = Signal(bool)
+
     def __init__(self, parent) -> None:
         # type: (QWidget | None) -> None
 
@@ -21,12 +23,16 @@ class SettingsView(GenericWindowView):
             None, lambda x: print("Check box", x)
         )
         self.__colorChooser = ColorPickerTool(None, lambda x: print("color picker", x))
+        self.__autoThemeCheckBox = CustomCheckBox(
+            None, lambda state: self.autoThemeToggled.emit(bool(state))
+        )
 
         row1 = SettingsRow(None, "Launch on Startup", self.__startupLaunchCheckBox)
         row2 = SettingsRow(None, "Font Size", self.__fontSizeSpinBox)
         row3 = SettingsRow(None, "Background Color", self.__colorChooser)
+        row4 = SettingsRow(None, "Colors from Album Art", self.__autoThemeCheckBox)
 
-        super().__init__(parent, "Settings", "", row1, row2, row3)
+        super().__init__(parent, "Settings", "", row1, row2, row3, row4)
 
 
 class SettingsRow(CustomHorizontalLayout):
@@ -0,0 +1,363 @@
+"""
+Local stand-in for the parts of the Spotify Web API used by `src/models/lyrics/api.py`.
+
+Serves `/v1/me/player/currently-playing`, `/v1/me/player/queue`, the playback controls
+(`play`, `pause`, `seek`, `next`, `previous`) and the `/api/token` refresh endpoint, driven by a
+scripted playlist. Latency and 429 responses can be scripted too, so polling, clock sync and
+back-off can be measured reproducibly without an account or network.
+
+Point a `PlaybackSession` at it with `api_prefix=server.api_prefix` and `token_url=server.token_url`,
+or set `SPOTIFY_API_PREFIX` and `SPOTIFY_TOKEN_URL` in `.env`.
+
+Usage (from the repository root): python -m tools.mock_spotify_server [--port PORT] [--script SCRIPT.json]
+"""
+
+import json, random, threading, time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import urlsplit, parse_qs
+
+
+class CONSTANTS:
+    __slots__ = ()
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_PORT = 8765
+    TOKEN_LIFETIME_S = 3600
+    DEFAULT_TRACKS = [
+        {"id": "mock0001", "name": "First Mock Track", "artists": ["Mock Artist"], "duration_ms": 180000},
+        {"id": "mock0002", "name": "Second Mock Track", "artists": ["Mock Artist", "Guest"], "duration_ms": 210000},
+        {"id": "mock0003", "name": "Third Mock Track", "artists": ["Another Artist"], "duration_ms": 95000},
+    ]
+
+
+class MockPlaybackScript:
+    """
+    Scripted playback state. Tracks play back to back (looping) following the given clock.
+
+    latency_ms / jitter_ms: Added to every response
+    rate_limit_windows: List of (start_s, end_s, retry_after_s) relative to the script start during
+                        which every API request is answered with 429
+    rate_limit_every: If > 0, every n-th API request is answered with 429
+    """
+
+    def __init__(
+        self,
+        tracks=None,
+        latency_ms=0,
+        jitter_ms=0,
+        rate_limit_windows=(),
+        rate_limit_every=0,
+        retry_after_s=1,
+        clock=time.monotonic,
+    ):
+        # type: (list[dict] | None, float, float, list[tuple[float, float, float]], int, float, Callable[[], float]) -> None
+        self.tracks = list(tracks if tracks else CONSTANTS.DEFAULT_TRACKS)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_windows = [tuple(w) for w in rate_limit_windows]
+        self.rate_limit_every = rate_limit_every
+        self.retry_after_s = retry_after_s
+
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__started_at = clock()
+        self.__index = 0
+        self.__position_ms = 0.0  # Position at `__anchor`
+        self.__anchor = self.__started_at
+        self.__is_playing = True
+        self.__api_requests = 0
+
+    @classmethod
+    def from_file(cls, path):
+        # type: (str) -> MockPlaybackScript
+        with open(path, "r", encoding="utf-8") as fp:
+            return cls(**json.load(fp))
+
+    def __advance(self):
+        # Must be called with the lock held. Moves to later tracks once the current one has ended
+        now = self.__clock()
+        if self.__is_playing:
+            self.__position_ms += (now - self.__anchor) * 1000
+            while self.__position_ms >= self.tracks[self.__index]["duration_ms"]:
+                self.__position_ms -= self.tracks[self.__index]["duration_ms"]
+                self.__index = (self.__index + 1) % len(self.tracks)
+        self.__anchor = now
+
+    def rate_limited(self):
+        # type: () -> float
+        """Retry-After seconds if this API request must be rejected, else 0"""
+        with self.__lock:
+            self.__api_requests += 1
+            elapsed = self.__clock() - self.__started_at
+
+            for start, end, retry_after in self.rate_limit_windows:
+                if start <= elapsed < end:
+                    return max(retry_after, 0.001)
+
+            if self.rate_limit_every > 0 and self.__api_requests % self.rate_limit_every == 0:
+                return max(self.retry_after_s, 0.001)
+        return 0
+
+    def response_delay_s(self):
+        # type: () -> float
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def __track_object(self, index):
+        # type: (int) -> dict
+        track = self.tracks[index % len(self.tracks)]
+        return {
+            "id": track["id"],
+            "name": track["name"],
+            "type": "track",
+            "duration_ms": track["duration_ms"],
+            "popularity": track.get("popularity", 50),
+            "artists": [{"name": name} for name in track["artists"]],
+            "album": {
+                "name": track.get("album", track["name"]),
+                "images": track.get(
+                    "images",
+                    [
+                        {"url": f"https://mock.invalid/{track['id']}/640", "width": 640, "height": 640},
+                        {"url": f"https://mock.invalid/{track['id']}/300", "width": 300, "height": 300},
+                        {"url": f"https://mock.invalid/{track['id']}/64", "width": 64, "height": 64},
+                    ],
+                ),
+            },
+        }
+
+    def currently_playing(self):
+        # type: () -> dict
+        with self.__lock:
+            self.__advance()
+            return {
+                "timestamp": int(time.time() * 1000),
+                "progress_ms": int(self.__position_ms),
+                "is_playing": self.__is_playing,
+                "currently_playing_type": "track",
+                "item": self.__track_object(self.__index),
+                "actions": {"disallows": {}},
+            }
+
+    def queue(self):
+        # type: () -> dict
+        with self.__lock:
+            self.__advance()
+            return {
+                "currently_playing": self.__track_object(self.__index),
+                "queue": [
+                    self.__track_object(self.__index + i)
+                    for i in range(1, len(self.tracks))
+                ],
+            }
+
+    def set_playing(self, is_playing):
+        # type: (bool) -> None
+        with self.__lock:
+            self.__advance()
+            self.__is_playing = is_playing
+
+    def seek(self, position_ms):
+        # type: (int) -> None
+        with self.__lock:
+            self.__advance()
+            duration = self.tracks[self.__index]["duration_ms"]
+            self.__position_ms = float(min(max(0, position_ms), duration - 1))
+
+    def skip(self, step):
+        # type: (int) -> None
+        with self.__lock:
+            self.__advance()
+            self.__index = (self.__index + step) % len(self.tracks)
+            self.__position_ms = 0.0
+
+
+class _MockSpotifyRequestHandler(BaseHTTPRequestHandler):
+    server: "_MockHTTPServer"
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def __send_json(self, status, payload=None, headers=None):
+        # type: (int, dict | None, dict | None) -> None
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def __handle(self, method):
+        # type: (str) -> None
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        if length:
+            self.rfile.read(length)
+
+        script = self.server.script
+        self.server.record(method, url.path)
+        time.sleep(script.response_delay_s())
+
+        if url.path == "/api/token" and method == "POST":
+            return self.__send_json(200, self.server.new_token_info(include_expiry=False))
+
+        if not url.path.startswith("/v1/"):
+            return self.__send_json(404, {"error": {"status": 404, "message": "Not found"}})
+
+        retry_after = script.rate_limited()
+        if retry_after:
+            return self.__send_json(
+                429,
+                {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                {"Retry-After": str(max(1, round(retry_after)))},
+            )
+
+        route = (method, url.path)
+        if route == ("GET", "/v1/me/player/currently-playing"):
+            return self.__send_json(200, script.currently_playing())
+        if route == ("GET", "/v1/me/player/queue"):
+            return self.__send_json(200, script.queue())
+        if route == ("PUT", "/v1/me/player/play"):
+            script.set_playing(True)
+            return self.__send_json(204)
+        if route == ("PUT", "/v1/me/player/pause"):
+            script.set_playing(False)
+            return self.__send_json(204)
+        if route == ("PUT", "/v1/me/player/seek"):
+            script.seek(int(query.get("position_ms", ["0"])[0]))
+            return self.__send_json(204)
+        if route == ("POST", "/v1/me/player/next"):
+            script.skip(1)
+            return self.__send_json(204)
+        if route == ("POST", "/v1/me/player/previous"):
+            script.skip(-1)
+            return self.__send_json(204)
+
+        return self.__send_json(404, {"error": {"status": 404, "message": "Not found"}})
+
+    def do_GET(self):
+        self.__handle("GET")
+
+    def do_POST(self):
+        self.__handle("POST")
+
+    def do_PUT(self):
+        self.__handle("PUT")
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, script):
+        # type: (tuple[str, int], MockPlaybackScript) -> None
+        super().__init__(address, _MockSpotifyRequestHandler)
+        self.script = script
+        self.requests = Counter()  # type: Counter[tuple[str, str]]
+        self.__lock = threading.Lock()
+        self.__token_counter = 0
+
+    def record(self, method, path):
+        # type: (str, str) -> None
+        with self.__lock:
+            self.requests[(method, path)] += 1
+
+    def new_token_info(self, include_expiry=True):
+        # type: (bool) -> dict
+        with self.__lock:
+            self.__token_counter += 1
+            token = f"mock-access-token-{self.__token_counter}"
+        token_info = {
+            "access_token": token,
+            "token_type": "Bearer",
+            "expires_in": CONSTANTS.TOKEN_LIFETIME_S,
+            "refresh_token": "mock-refresh-token",
+            "scope": "user-read-playback-state user-modify-playback-state user-read-currently-playing",
+        }
+        if include_expiry:
+            token_info["expires_at"] = int(time.time()) + CONSTANTS.TOKEN_LIFETIME_S
+        return token_info
+
+
+class MockSpotifyServer:
+    """Run the mock API on a background thread. Use as a context manager or call `start` and `stop`"""
+
+    def __init__(self, script=None, host=CONSTANTS.DEFAULT_HOST, port=0):
+        # type: (MockPlaybackScript | None, str, int) -> None
+        self.script = script if script is not None else MockPlaybackScript()
+        self.__server = _MockHTTPServer((host, port), self.script)
+        self.__thread = None  # type: threading.Thread | None
+
+    @property
+    def base_url(self):
+        # type: () -> str
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_prefix(self):
+        # type: () -> str
+        return self.base_url + "/v1/"
+
+    @property
+    def token_url(self):
+        # type: () -> str
+        return self.base_url + "/api/token"
+
+    @property
+    def requests(self):
+        # type: () -> Counter
+        """Number of requests received per (method, path)"""
+        return self.__server.requests
+
+    def token_info(self):
+        # type: () -> dict
+        """Valid token info to seed a session's cache handler, so no browser login is attempted"""
+        return self.__server.new_token_info()
+
+    def start(self):
+        # type: () -> MockSpotifyServer
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, name="MockSpotifyServer", daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        # type: () -> None
+        self.__server.shutdown()
+        self.__server.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in Spotify Web API")
+    parser.add_argument("--host", default=CONSTANTS.DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=CONSTANTS.DEFAULT_PORT)
+    parser.add_argument("--script", help="JSON file with MockPlaybackScript arguments")
+    args = parser.parse_args()
+
+    script = MockPlaybackScript.from_file(args.script) if args.script else None
+    server = MockSpotifyServer(script, args.host, args.port)
+    print(f"Mock Spotify API on {server.api_prefix} (token url: {server.token_url})")
+    with server:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,305 @@
+"""
+Fake MPRIS player on a private `dbus-daemon`, for exercising `MprisPlaybackSource` without a real player.
+
+`PrivateSessionBus` starts `dbus-daemon --session` and exposes its address. `FakeMprisPlayer` owns
+`org.mpris.MediaPlayer2.<name>` on that bus and exports the `Player` properties that the source reads.
+Track changes, play/pause and seeks emit the same `PropertiesChanged` and `Seeked` signals a real player does.
+
+Usage (from the repository root): python -m tools.mpris_fake_player
+"""
+
+import signal, subprocess, threading, time
+from typing import Callable
+
+import gi
+
+gi.require_version("Gio", "2.0")
+from gi.repository import Gio, GLib
+
+
+class CONSTANTS:
+    __slots__ = ()
+    BUS_NAME_PREFIX = "org.mpris.MediaPlayer2."
+    OBJECT_PATH = "/org/mpris/MediaPlayer2"
+    PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+    PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+    START_TIMEOUT_S = 5
+    INTROSPECTION_XML = """
+<node>
+  <interface name="org.mpris.MediaPlayer2.Player">
+    <method name="PlayPause"/>
+    <method name="Play"/>
+    <method name="Pause"/>
+    <method name="SetPosition">
+      <arg direction="in" name="TrackId" type="o"/>
+      <arg direction="in" name="Position" type="x"/>
+    </method>
+    <signal name="Seeked">
+      <arg name="Position" type="x"/>
+    </signal>
+    <property name="PlaybackStatus" type="s" access="read"/>
+    <property name="Metadata" type="a{sv}" access="read"/>
+    <property name="Position" type="x" access="read"/>
+    <property name="Rate" type="d" access="read"/>
+  </interface>
+</node>
+"""
+
+
+class PrivateSessionBus:
+    """A throwaway `dbus-daemon` session bus. Use as a context manager or call `start` and `stop`"""
+
+    def __init__(self):
+        self.address = ""
+        self.__process = None  # type: subprocess.Popen | None
+
+    def start(self):
+        # type: () -> PrivateSessionBus
+        self.__process = subprocess.Popen(
+            ["dbus-daemon", "--session", "--nofork", "--print-address"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.address = self.__process.stdout.readline().strip()
+        if not self.address:
+            self.stop()
+            raise RuntimeError("dbus-daemon did not report an address")
+        return self
+
+    def stop(self):
+        # type: () -> None
+        if self.__process is not None:
+            self.__process.send_signal(signal.SIGTERM)
+            self.__process.wait(CONSTANTS.START_TIMEOUT_S)
+            self.__process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def _metadata_variant(track):
+    # type: (dict) -> GLib.Variant
+    return GLib.Variant(
+        "a{sv}",
+        {
+            "mpris:trackid": GLib.Variant("o", f"/com/spotify/track/{track['id']}"),
+            "mpris:length": GLib.Variant("x", track["duration_ms"] * 1000),
+            "xesam:title": GLib.Variant("s", track["name"]),
+            "xesam:artist": GLib.Variant("as", track["artists"]),
+            "mpris:artUrl": GLib.Variant("s", track.get("art_url", "")),
+        },
+    )
+
+
+class FakeMprisPlayer:
+    """
+    Scripted MPRIS player. Each change method blocks until the change has been emitted on the bus.
+
+    Position follows the given clock while playing, like a real player, but `Seeked` is only sent by `seek`.
+    """
+
+    def __init__(self, bus_address, player_name="spotify", clock=time.monotonic):
+        # type: (str, str, Callable[[], float]) -> None
+        self.bus_name = CONSTANTS.BUS_NAME_PREFIX + player_name
+        self.bus_address = bus_address
+
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__track = None  # type: dict | None
+        self.__status = "Stopped"
+        self.__position_us = 0
+        self.__anchor = clock()
+
+        self.__context = None  # type: GLib.MainContext | None
+        self.__loop = None  # type: GLib.MainLoop | None
+        self.__connection = None  # type: Gio.DBusConnection | None
+        self.__thread = None  # type: threading.Thread | None
+
+    def start(self):
+        # type: () -> FakeMprisPlayer
+        ready = threading.Event()
+
+        def run():
+            self.__context = GLib.MainContext.new()
+            self.__context.push_thread_default()
+            self.__connection = Gio.DBusConnection.new_for_address_sync(
+                self.bus_address,
+                Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
+                | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+                None,
+                None,
+            )
+            node = Gio.DBusNodeInfo.new_for_xml(CONSTANTS.INTROSPECTION_XML)
+            self.__connection.register_object(
+                CONSTANTS.OBJECT_PATH,
+                node.interfaces[0],
+                self.__on_method_call,
+                self.__on_get_property,
+                None,
+            )
+            self.__connection.call_sync(
+                "org.freedesktop.DBus",
+                "/org/freedesktop/DBus",
+                "org.freedesktop.DBus",
+                "RequestName",
+                GLib.Variant("(su)", (self.bus_name, 0)),
+                None,
+                Gio.DBusCallFlags.NONE,
+                -1,
+                None,
+            )
+            self.__loop = GLib.MainLoop.new(self.__context, False)
+            ready.set()
+            self.__loop.run()
+            self.__context.pop_thread_default()
+
+        self.__thread = threading.Thread(target=run, name="FakeMprisPlayer", daemon=True)
+        self.__thread.start()
+        if not ready.wait(CONSTANTS.START_TIMEOUT_S):
+            raise RuntimeError("Fake player did not come up on the bus")
+        return self
+
+    def stop(self):
+        # type: () -> None
+        if self.__loop is not None:
+            self.__loop.quit()
+        if self.__thread is not None:
+            self.__thread.join(CONSTANTS.START_TIMEOUT_S)
+        if self.__connection is not None:
+            self.__connection.close_sync(None)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __position(self):
+        # type: () -> int
+        # Must be called with the lock held
+        if self.__status != "Playing":
+            return self.__position_us
+        return self.__position_us + int((self.__clock() - self.__anchor) * 1_000_000)
+
+    def __set_position(self, position_us):
+        # Must be called with the lock held
+        self.__position_us = position_us
+        self.__anchor = self.__clock()
+
+    def __on_get_property(self, connection, sender, path, interface, name):
+        with self.__lock:
+            if name == "PlaybackStatus":
+                return GLib.Variant("s", self.__status)
+            if name == "Metadata":
+                return _metadata_variant(self.__track) if self.__track else GLib.Variant("a{sv}", {})
+            if name == "Position":
+                return GLib.Variant("x", self.__position())
+            if name == "Rate":
+                return GLib.Variant("d", 1.0)
+        return None
+
+    def __on_method_call(self, connection, sender, path, interface, method, parameters, invocation):
+        if method in ("Play", "Pause", "PlayPause"):
+            playing = method == "Play" or (method == "PlayPause" and self.__status != "Playing")
+            self.__apply_status("Playing" if playing else "Paused")
+        elif method == "SetPosition":
+            self.__apply_seek(parameters.unpack()[1])
+        invocation.return_value(None)
+
+    # Changes are applied on the player's thread so signals leave in order
+
+    def __invoke(self, fn, *args):
+        done = threading.Event()
+
+        def call():
+            fn(*args)
+            done.set()
+            return GLib.SOURCE_REMOVE
+
+        self.__context.invoke_full(GLib.PRIORITY_DEFAULT, call)
+        done.wait(CONSTANTS.START_TIMEOUT_S)
+
+    def __emit_properties_changed(self, changed):
+        # type: (dict[str, GLib.Variant]) -> None
+        self.__connection.emit_signal(
+            None,
+            CONSTANTS.OBJECT_PATH,
+            CONSTANTS.PROPERTIES_INTERFACE,
+            "PropertiesChanged",
+            GLib.Variant("(sa{sv}as)", (CONSTANTS.PLAYER_INTERFACE, changed, [])),
+        )
+
+    def __apply_track(self, track, playing):
+        with self.__lock:
+            self.__track = track
+            self.__status = "Playing" if playing else "Paused"
+            self.__set_position(0)
+            metadata = _metadata_variant(track)
+        self.__emit_properties_changed(
+            {"Metadata": metadata, "PlaybackStatus": GLib.Variant("s", self.__status)}
+        )
+
+    def __apply_status(self, status):
+        with self.__lock:
+            self.__set_position(self.__position())
+            self.__status = status
+        self.__emit_properties_changed({"PlaybackStatus": GLib.Variant("s", status)})
+
+    def __apply_seek(self, position_us):
+        with self.__lock:
+            self.__set_position(max(0, position_us))
+            position_us = self.__position_us
+        self.__connection.emit_signal(
+            None,
+            CONSTANTS.OBJECT_PATH,
+            CONSTANTS.PLAYER_INTERFACE,
+            "Seeked",
+            GLib.Variant("(x)", (position_us,)),
+        )
+
+    def play_track(self, track, playing=True):
+        # type: (dict, bool) -> None
+        """`track` uses the `mock_spotify_server` track shape: id, name, artists, duration_ms"""
+        self.__invoke(self.__apply_track, track, playing)
+
+    def set_playing(self, playing):
+        # type: (bool) -> None
+        self.__invoke(self.__apply_status, "Playing" if playing else "Paused")
+
+    def stop_playback(self):
+        # type: () -> None
+        self.__invoke(self.__apply_status, "Stopped")
+
+    def seek(self, position_ms):
+        # type: (int) -> None
+        self.__invoke(self.__apply_seek, position_ms * 1000)
+
+
+if __name__ == "__main__":
+    from tools.mock_spotify_server import CONSTANTS as MOCK_CONSTANTS
+    from src.models.lyrics.mpris_source import MprisPlaybackSource
+
+    with PrivateSessionBus() as bus, FakeMprisPlayer(bus.address) as player:
+        print(f"Private session bus at {bus.address}")
+        changes = threading.Event()
+
+        with MprisPlaybackSource(bus_address=bus.address, on_change=changes.set) as source:
+            for track in MOCK_CONSTANTS.DEFAULT_TRACKS:
+                changes.clear()
+                sent_at = time.perf_counter()
+                player.play_track(track)
+                changes.wait(CONSTANTS.START_TIMEOUT_S)
+                print(f"{(time.perf_counter() - sent_at) * 1000:.2f}ms", source.current())
+
+            changes.clear()
+            player.seek(60000)
+            changes.wait(CONSTANTS.START_TIMEOUT_S)
+            print("After seek:", source.current())
+
+            changes.clear()
+            player.set_playing(False)
+            changes.wait(CONSTANTS.START_TIMEOUT_S)
+            print("Paused:", source.poll())